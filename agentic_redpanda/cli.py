@@ -3,27 +3,33 @@
 import argparse
 import asyncio
 import logging
+import signal
 import sys
 from pathlib import Path
+from typing import Dict, Type
 
-from .utils import load_config, setup_logging
+from .utils import install_uvloop, load_config, setup_logging
 from .core.agent import Agent
 from .core.message_broker import MessageBroker
-from .providers import OpenAIProvider, OllamaProvider
+from .providers import LLMProvider, OpenAIProvider, OllamaProvider
 
+# LLM provider classes by configured provider_type
+PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    "openai": OpenAIProvider,
+    "ollama": OllamaProvider,
+}
 
-def create_agent_from_config(agent_config, message_broker):
+
+def create_agent_from_config(agent_config, message_broker, topic_manager=None):
     """Create an agent from configuration."""
     # Create LLM provider
     provider_config = agent_config.llm_provider.dict()
     provider_type = provider_config.pop("provider_type")
     
-    if provider_type == "openai":
-        llm_provider = OpenAIProvider(provider_config)
-    elif provider_type == "ollama":
-        llm_provider = OllamaProvider(provider_config)
-    else:
+    provider_class = PROVIDERS.get(provider_type)
+    if provider_class is None:
         raise ValueError(f"Unsupported provider type: {provider_type}")
+    llm_provider = provider_class(provider_config)
     
     # Create agent
     agent = Agent(
@@ -32,7 +38,8 @@ def create_agent_from_config(agent_config, message_broker):
         role=agent_config.role,
         llm_provider=llm_provider,
         message_broker=message_broker,
-        topics=agent_config.topics
+        topics=agent_config.topics,
+        topic_manager=topic_manager
     )
     
     return agent
@@ -50,11 +57,14 @@ async def run_agents(config_path: str):
     # Create message broker
     message_broker = MessageBroker(**config.message_broker.dict())
     
+    # All agents share the broker's topic catalog
+    topic_manager = message_broker.topic_manager
+    
     # Create agents
     agents = []
     for agent_config in config.agents:
         try:
-            agent = create_agent_from_config(agent_config, message_broker)
+            agent = create_agent_from_config(agent_config, message_broker, topic_manager)
             agents.append(agent)
         except Exception as e:
             logger.error(f"Failed to create agent {agent_config.agent_id}: {e}")
@@ -68,29 +78,49 @@ async def run_agents(config_path: str):
         # Start message broker
         await message_broker.start()
         
-        # Start all agents
-        for agent in agents:
-            await agent.start()
+        # Start all agents concurrently
+        results = await asyncio.gather(
+            *(agent.start() for agent in agents),
+            return_exceptions=True
+        )
+        for agent, result in zip(agents, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to start agent {agent.agent_id}: {result}")
+        
+        # Only keep agents that actually started
+        agents = [agent for agent, result in zip(agents, results) if not isinstance(result, Exception)]
+        if not agents:
+            logger.error("No agents could be started")
+            return
         
         logger.info(f"Started {len(agents)} agents. Press Ctrl+C to stop.")
         
         # Keep running until interrupted
-        try:
-            while True:
-                await asyncio.sleep(1)
-        except KeyboardInterrupt:
-            logger.info("Shutting down...")
+        loop = asyncio.get_running_loop()
+        stop_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                # Signal handlers are unavailable on Windows event loops;
+                # Ctrl+C still surfaces as KeyboardInterrupt there
+                pass
+        
+        await stop_event.wait()
+        logger.info("Shutting down...")
     
     except Exception as e:
         logger.error(f"Error running agents: {e}")
         raise
     finally:
         # Clean up
-        for agent in agents:
-            try:
-                await agent.stop()
-            except Exception as e:
-                logger.error(f"Error stopping agent {agent.agent_id}: {e}")
+        results = await asyncio.gather(
+            *(agent.stop() for agent in agents),
+            return_exceptions=True
+        )
+        for agent, result in zip(agents, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error stopping agent {agent.agent_id}: {result}")
         
         try:
             await message_broker.stop()
@@ -132,6 +162,9 @@ def main():
         print("Please create a configuration file or use the example: config/example.yaml")
         sys.exit(1)
     
+    # Use the libuv-based event loop where available
+    install_uvloop()
+    
     # Run agents
     try:
         asyncio.run(run_agents(str(config_path)))
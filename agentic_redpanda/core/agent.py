@@ -2,20 +2,124 @@
 
 import asyncio
 import logging
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Set
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 from ..providers.base import LLMProvider
+from ..providers.batcher import LLMBatcher
 from ..schemas.message import AgentMessage, MessageType, MessagePriority
-from .message_broker import MessageBroker
+from .message_broker import MessageBroker, STOP_DRAINING, drain_batches
 from .topic_manager import TopicManager
 
 logger = logging.getLogger(__name__)
 
+# Semaphores limiting concurrent LLM requests, per event loop and endpoint
+_llm_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _get_llm_semaphore(llm_provider: LLMProvider, limit: int) -> asyncio.Semaphore:
+    """Get the semaphore shared by all agents using the same LLM endpoint.
+    
+    Must be called from a running event loop. The first caller for an
+    endpoint decides its limit.
+    
+    Args:
+        llm_provider: LLM provider instance
+        limit: Maximum concurrent requests to the endpoint
+    
+    Returns:
+        Shared semaphore for the provider's endpoint
+    """
+    endpoint = f"{llm_provider.__class__.__name__}:{llm_provider.config.get('base_url') or ''}"
+    per_loop = _llm_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if endpoint not in per_loop:
+        per_loop[endpoint] = asyncio.Semaphore(limit)
+    return per_loop[endpoint]
+
+
+# Request batchers shared by agents using the same provider, per event loop
+_llm_batchers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _get_llm_batcher(
+    llm_provider: LLMProvider,
+    max_batch: int,
+    max_delay_ms: int,
+    semaphore: asyncio.Semaphore
+) -> LLMBatcher:
+    """Get the request batcher shared by all agents using a provider.
+    
+    Must be called from a running event loop. The first caller for a
+    provider decides the batcher settings.
+    
+    Args:
+        llm_provider: LLM provider instance
+        max_batch: Maximum number of prompts per batch
+        max_delay_ms: Coalescing window in milliseconds
+        semaphore: Semaphore bounding concurrent batch calls
+    
+    Returns:
+        Shared batcher for the provider
+    """
+    per_loop = _llm_batchers.setdefault(asyncio.get_running_loop(), {})
+    if llm_provider not in per_loop:
+        per_loop[llm_provider] = LLMBatcher(
+            llm_provider,
+            max_batch=max_batch,
+            max_delay_ms=max_delay_ms,
+            semaphore=semaphore
+        )
+    return per_loop[llm_provider]
+
+
+def _is_default_notification_handler(handler: Any) -> bool:
+    """Return True if handler is Agent's own notification handler.
+    
+    That handler only logs, so callers can log inline instead of creating
+    its coroutine. Overrides and replacement handlers are awaited as usual.
+    """
+    return getattr(handler, "__func__", None) is Agent._handle_notification_message
+
 
 class Agent(ABC):
     """Base class for AI agents in the communication system."""
     
+    # Subclasses that add attributes get a __dict__ unless they declare
+    # their own __slots__
+    __slots__ = (
+        "agent_id",
+        "agent_id_bytes",
+        "agent_name",
+        "role",
+        "llm_provider",
+        "message_broker",
+        "topic_manager",
+        "config",
+        "_system_message",
+        "subscribed_topics",
+        "running",
+        "message_handlers",
+        "conversation_history",
+        "last_activity",
+        "max_batch_size",
+        "max_delay_ms",
+        "_send_queue",
+        "_flush_task",
+        "health_check_ttl",
+        "_llm_health_cache",
+        "llm_concurrency",
+        "_llm_sem",
+        "llm_batch_delay_ms",
+        "_llm_batcher",
+        "handler_concurrency",
+        "_handler_slots",
+        "_handler_tasks",
+        "__weakref__",
+    )
+    
     def __init__(
         self,
         agent_id: str,
@@ -24,7 +128,8 @@ class Agent(ABC):
         llm_provider: LLMProvider,
         message_broker: MessageBroker,
         topics: Optional[List[str]] = None,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        topic_manager: Optional[TopicManager] = None
     ):
         """Initialize the agent.
         
@@ -36,14 +141,18 @@ class Agent(ABC):
             message_broker: Message broker instance
             topics: List of topics to subscribe to
             config: Additional configuration
+            topic_manager: Topic catalog to use; defaults to the one owned
+                by the message broker so agents sharing a broker share it
         """
         self.agent_id = agent_id
+        self.agent_id_bytes = agent_id.encode('utf-8')
         self.agent_name = agent_name
         self.role = role
         self.llm_provider = llm_provider
         self.message_broker = message_broker
-        self.topic_manager = TopicManager()
+        self.topic_manager = topic_manager or message_broker.topic_manager
         self.config = config or {}
+        self._system_message = f"You are {agent_name}, a {role} agent. Respond helpfully and concisely."
         
         # Topic management
         self.subscribed_topics: Set[str] = set(topics or [])
@@ -58,41 +167,93 @@ class Agent(ABC):
         }
         
         # Agent state
-        self.conversation_history: List[Dict[str, str]] = []
+        self.conversation_history: Deque[Dict[str, str]] = deque(
+            maxlen=self.config.get("history_limit", 512)
+        )
         self.last_activity = None
         
+        # Outgoing message batching
+        self.max_batch_size: int = self.config.get("max_batch_size", 64)
+        self.max_delay_ms: int = self.config.get("max_delay_ms", 10)
+        self._send_queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Cached LLM provider health as (checked_at, healthy)
+        self.health_check_ttl: float = self.config.get("health_check_ttl", 5.0)
+        self._llm_health_cache: Tuple[float, bool] = (float("-inf"), False)
+        
+        # Concurrency limit shared with other agents on the same LLM endpoint
+        self.llm_concurrency: int = self.config.get("llm_concurrency", 8)
+        self._llm_sem: Optional[asyncio.Semaphore] = None
+        
+        # Optional coalescing of LLM requests across agents (0 disables)
+        self.llm_batch_delay_ms: int = self.config.get("llm_batch_delay_ms", 0)
+        self._llm_batcher: Optional[LLMBatcher] = None
+        
+        # Incoming messages handled concurrently, off the broker's poll loop
+        self.handler_concurrency: int = self.config.get("handler_concurrency", 16)
+        self._handler_slots: Optional[asyncio.Semaphore] = None
+        self._handler_tasks: Set[asyncio.Task] = set()
+    
     async def start(self) -> None:
         """Start the agent."""
         try:
             # Validate LLM provider
-            if not await self.llm_provider.health_check():
+            if not await self._check_llm_health():
                 raise RuntimeError("LLM provider is not healthy")
             
             # Start message broker if not already started
             if not self.message_broker.running:
                 await self.message_broker.start()
             
-            # Subscribe to topics
-            for topic in self.subscribed_topics:
-                await self._subscribe_to_topic(topic)
+            # Subscribe to topics concurrently
+            topics = list(self.subscribed_topics)
+            results = await asyncio.gather(
+                *(self._subscribe_to_topic(topic) for topic in topics),
+                return_exceptions=True
+            )
+            for topic, result in zip(topics, results):
+                if isinstance(result, Exception):
+                    logger.error("Failed to subscribe to topic %s: %s", topic, result)
+                    self.subscribed_topics.discard(topic)
+            
+            # Start the outgoing message flusher
+            self._send_queue = asyncio.Queue()
+            self._flush_task = asyncio.create_task(self._flush_loop())
             
             self.running = True
-            logger.info(f"Agent {self.agent_name} ({self.agent_id}) started")
+            logger.info("Agent %s (%s) started", self.agent_name, self.agent_id)
             
         except Exception as e:
-            logger.error(f"Failed to start agent {self.agent_name}: {e}")
+            logger.error("Failed to start agent %s: %s", self.agent_name, e)
             raise
     
     async def stop(self) -> None:
         """Stop the agent."""
         self.running = False
         
+        # Let in-flight message handlers finish so their replies are flushed
+        if self._handler_tasks:
+            await asyncio.gather(*self._handler_tasks, return_exceptions=True)
+        
+        # Flush pending outgoing messages
+        if self._flush_task:
+            await self._send_queue.put(STOP_DRAINING)
+            await self._flush_task
+            self._flush_task = None
+            self._send_queue = None
+        
+        # Wait for the broker to confirm everything we published
+        await self.message_broker.drain()
+        
         # Unsubscribe from all topics
-        for topic in list(self.subscribed_topics):
-            await self.message_broker.unsubscribe_from_topic(topic)
+        try:
+            await self.message_broker.unsubscribe_all(self.agent_id)
+        except Exception as e:
+            logger.error("Failed to unsubscribe agent %s: %s", self.agent_id, e)
         
         self.subscribed_topics.clear()
-        logger.info(f"Agent {self.agent_name} ({self.agent_id}) stopped")
+        logger.info("Agent %s (%s) stopped", self.agent_name, self.agent_id)
     
     async def send_message(
         self,
@@ -121,6 +282,10 @@ class Agent(ABC):
             
         Returns:
             Message ID
+        
+        Messages are queued and published in batches by a background
+        flusher once the agent is started, so this returns before the
+        broker has confirmed the message.
         """
         message = AgentMessage(
             sender_id=self.agent_id,
@@ -137,11 +302,67 @@ class Agent(ABC):
             tags=tags or []
         )
         
-        await self.message_broker.publish_message(message)
-        logger.debug(f"Sent message to topic {topic}: {content[:50]}...")
+        await self._enqueue(message)
+        return str(message.id)
+    
+    async def send_text(self, content: str, topic: str, reply_to: Optional[str] = None) -> str:
+        """Send a plain text message with default options.
+        
+        Equivalent to ``send_message(content, topic, reply_to=reply_to)``
+        but skips model validation, which dominates the cost of building
+        a message, once the inputs are known to be valid.
+        
+        Args:
+            content: Message content
+            topic: Target topic
+            reply_to: Topic to reply to
+        
+        Returns:
+            Message ID
+        """
+        content = content.strip()
+        topic = topic.strip()
+        if not content or not topic:
+            # Let full validation raise the usual error
+            return await self.send_message(content, topic, reply_to=reply_to)
+        
+        message = AgentMessage.model_construct(
+            sender_id=self.agent_id,
+            sender_name=self.agent_name,
+            sender_role=self.role,
+            message_type=MessageType.TEXT,
+            priority=MessagePriority.NORMAL,
+            content=content,
+            topic=topic,
+            reply_to=reply_to
+        )
         
+        await self._enqueue(message)
         return str(message.id)
     
+    async def _enqueue(self, message: AgentMessage) -> None:
+        """Queue a message for publishing, or publish it if not started."""
+        if self._send_queue is not None:
+            await self._send_queue.put(message)
+        else:
+            await self.message_broker.publish_message(message)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sent message to topic %s: %.50s...", message.topic, message.content)
+    
+    async def _flush_loop(self) -> None:
+        """Drain the send queue into batched broker publishes."""
+        await drain_batches(
+            self._send_queue,
+            self.max_batch_size,
+            self.max_delay_ms / 1000,
+            self.message_broker.publish_batch,
+            self._on_batch_error
+        )
+    
+    async def _on_batch_error(self, error: Exception, batch: List[AgentMessage]) -> None:
+        """Log a batch that failed to publish."""
+        logger.error("Failed to publish batch of %d messages: %s", len(batch), error)
+    
     async def subscribe_to_topic(self, topic: str) -> bool:
         """Subscribe to a topic.
         
@@ -156,7 +377,7 @@ class Agent(ABC):
             self.subscribed_topics.add(topic)
             return True
         except Exception as e:
-            logger.error(f"Failed to subscribe to topic {topic}: {e}")
+            logger.error("Failed to subscribe to topic %s: %s", topic, e)
             return False
     
     async def unsubscribe_from_topic(self, topic: str) -> bool:
@@ -173,7 +394,7 @@ class Agent(ABC):
             self.subscribed_topics.discard(topic)
             return True
         except Exception as e:
-            logger.error(f"Failed to unsubscribe from topic {topic}: {e}")
+            logger.error("Failed to unsubscribe from topic %s: %s", topic, e)
             return False
     
     async def create_topic(
@@ -207,11 +428,11 @@ class Agent(ABC):
             # Create topic in message broker
             await self.message_broker.create_topic(topic_name)
             
-            logger.info(f"Created topic {topic_name}")
+            logger.info("Created topic %s", topic_name)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to create topic {topic_name}: {e}")
+            logger.error("Failed to create topic %s: %s", topic_name, e)
             return False
     
     async def list_topics(self) -> List[str]:
@@ -224,12 +445,22 @@ class Agent(ABC):
     
     async def _subscribe_to_topic(self, topic: str) -> None:
         """Internal method to subscribe to a topic."""
-        await self.message_broker.subscribe_to_topic(
+        await self.message_broker.subscribe_to_topic_batch(
             topic=topic,
             agent_id=self.agent_id,
-            handler=self._handle_message
+            handler=self._handle_batch,
+            batch_size=self.config.get("consume_batch_size", 20),
+            key_filter=self._is_foreign_key
         )
     
+    def _is_foreign_key(self, key: Optional[bytes]) -> bool:
+        """Return True if a record key was not produced by this agent.
+        
+        Records are keyed by sender ID, so this lets the broker drop our
+        own messages without decoding them.
+        """
+        return key != self.agent_id_bytes
+    
     async def _handle_message(self, message: AgentMessage) -> None:
         """Handle incoming messages.
         
@@ -249,16 +480,44 @@ class Agent(ABC):
             
             # Route to appropriate handler
             handler = self.message_handlers.get(message.message_type)
-            if handler:
-                await handler(message)
+            if not handler:
+                logger.warning("No handler for message type %s", message.message_type)
+            elif _is_default_notification_handler(handler):
+                self._log_notification(message)
             else:
-                logger.warning(f"No handler for message type {message.message_type}")
+                await handler(message)
             
             # Update last activity
             self.last_activity = message.timestamp
             
         except Exception as e:
-            logger.error(f"Error handling message: {e}")
+            logger.error("Error handling message: %s", e)
+    
+    async def _handle_batch(self, messages: List[AgentMessage]) -> None:
+        """Handle a batch of incoming messages.
+        
+        Each message is handled by _handle_message in its own task, started
+        in arrival order, so a slow reply does not hold up the broker's poll
+        loop. At most handler_concurrency messages are handled at once; once
+        that many are running, this waits for one to finish, which pauses
+        polling.
+        
+        Args:
+            messages: Incoming messages, in arrival order
+        """
+        if self._handler_slots is None:
+            self._handler_slots = asyncio.Semaphore(self.handler_concurrency)
+        
+        for message in messages:
+            await self._handler_slots.acquire()
+            task = asyncio.ensure_future(self._handle_message(message))
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._on_handler_done)
+    
+    def _on_handler_done(self, task: asyncio.Task) -> None:
+        """Free the slot of a finished message handler task."""
+        self._handler_tasks.discard(task)
+        self._handler_slots.release()
     
     async def _handle_text_message(self, message: AgentMessage) -> None:
         """Handle text messages.
@@ -268,11 +527,7 @@ class Agent(ABC):
         """
         # Default implementation: echo the message
         response = await self._generate_response(message.content)
-        await self.send_message(
-            content=response,
-            topic=message.topic,
-            reply_to=message.sender_id
-        )
+        await self.send_text(response, message.topic, reply_to=message.sender_id)
     
     async def _handle_task_message(self, message: AgentMessage) -> None:
         """Handle task messages.
@@ -310,7 +565,11 @@ class Agent(ABC):
             message: Notification message
         """
         # Default implementation: log the notification
-        logger.info(f"Notification from {message.sender_name}: {message.content}")
+        self._log_notification(message)
+    
+    def _log_notification(self, message: AgentMessage) -> None:
+        """Log a notification message."""
+        logger.info("Notification from %s: %s", message.sender_name, message.content)
     
     async def _generate_response(self, prompt: str) -> str:
         """Generate a response using the LLM provider.
@@ -322,14 +581,25 @@ class Agent(ABC):
             Generated response
         """
         try:
-            # Add system message based on role
-            system_message = f"You are {self.agent_name}, a {self.role} agent. Respond helpfully and concisely."
+            if self._llm_sem is None:
+                self._llm_sem = _get_llm_semaphore(self.llm_provider, self.llm_concurrency)
             
             # Generate response
-            response = await self.llm_provider.generate(
-                prompt=prompt,
-                system_message=system_message
-            )
+            if self.llm_batch_delay_ms > 0:
+                if self._llm_batcher is None:
+                    self._llm_batcher = _get_llm_batcher(
+                        self.llm_provider,
+                        max_batch=self.config.get("llm_max_batch", 16),
+                        max_delay_ms=self.llm_batch_delay_ms,
+                        semaphore=self._llm_sem
+                    )
+                response = await self._llm_batcher.submit(prompt, self._system_message)
+            else:
+                async with self._llm_sem:
+                    response = await self.llm_provider.generate(
+                        prompt=prompt,
+                        system_message=self._system_message
+                    )
             
             # Update conversation history
             self.conversation_history.append({
@@ -340,7 +610,7 @@ class Agent(ABC):
             return response.content
             
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
+            logger.error("Error generating response: %s", e)
             return f"Sorry, I encountered an error: {str(e)}"
     
     @abstractmethod
@@ -373,5 +643,18 @@ class Agent(ABC):
             "conversation_length": len(self.conversation_history),
             "last_activity": self.last_activity,
             "llm_provider": self.llm_provider.__class__.__name__,
-            "llm_healthy": await self.llm_provider.health_check()
+            "llm_healthy": await self._check_llm_health()
         }
+    
+    async def _check_llm_health(self) -> bool:
+        """Check LLM provider health, reusing results younger than the TTL.
+        
+        Returns:
+            True if the provider is healthy, False otherwise
+        """
+        checked_at, healthy = self._llm_health_cache
+        now = time.monotonic()
+        if now - checked_at > self.health_check_ttl:
+            healthy = await self.llm_provider.health_check()
+            self._llm_health_cache = (now, healthy)
+        return healthy
@@ -1,18 +1,34 @@
 """Conversation management and threading for agent communications."""
 
 import asyncio
+import bisect
+import heapq
 import logging
-from typing import Any, Dict, List, Optional, Set, Tuple
+import re
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from uuid import UUID, uuid4
 
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator for batch_search_threads
+    ahocorasick = None
+
 from ..schemas.message import AgentMessage, MessageType
 
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"\w+")
+
+# dataclass(slots=True) needs Python 3.10; instances keep a __dict__ on 3.9
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
-@dataclass
+@dataclass(**_SLOTS)
 class ConversationThread:
     """Represents a conversation thread."""
     
@@ -27,13 +43,13 @@ class ConversationThread:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ConversationContext:
     """Context for a conversation."""
     
     thread_id: UUID
     topic: str
-    recent_messages: List[AgentMessage]
+    recent_messages: Deque[AgentMessage]
     participants: Set[str]
     thread_title: Optional[str] = None
     created_at: datetime = field(default_factory=datetime.utcnow)
@@ -52,18 +68,46 @@ class ConversationManager:
         """
         self.max_context_messages = max_context_messages
         self.thread_timeout = thread_timeout
+        self._thread_timeout_secs = thread_timeout.total_seconds()
         
         # Thread management
         self.threads: Dict[UUID, ConversationThread] = {}
-        self.topic_threads: Dict[str, List[UUID]] = {}  # topic -> list of thread IDs
-        self.agent_threads: Dict[str, Set[UUID]] = {}  # agent_id -> set of thread IDs
+        self.topic_threads: Dict[str, List[UUID]] = defaultdict(list)  # topic -> list of thread IDs
+        self.agent_threads: Dict[str, Set[UUID]] = defaultdict(set)  # agent_id -> set of thread IDs
+        self.active_thread_by_topic: Dict[str, UUID] = {}  # topic -> current active thread ID
         
         # Message threading
-        self.message_threads: Dict[str, UUID] = {}  # message_id -> thread_id
-        self.thread_messages: Dict[UUID, List[AgentMessage]] = {}  # thread_id -> messages
+        self.message_threads: Dict[UUID, UUID] = {}  # message_id -> thread_id
+        
+        # Monotonic time of the last message seen per thread, for cheap reuse checks
+        self._mono_activity: Dict[UUID, float] = {}
+        
+        # Archive queue of (last_activity, thread_id). Each thread's current entry
+        # is recorded in _heap_activity and never later than its last activity;
+        # newer activity is picked up when the entry is popped
+        self._activity_heap: List[Tuple[datetime, UUID]] = []
+        self._heap_activity: Dict[UUID, datetime] = {}
+        
+        # Running statistics
+        self._active_thread_count = 0
+        self._total_message_count = 0
+        self._evicted_message_count = 0  # since the last cleanup
+        
+        # Search index
+        self._token_to_threads: Dict[str, Set[UUID]] = {}  # token -> thread IDs
+        self._thread_tokens: Dict[UUID, Dict[str, int]] = {}  # thread_id -> token -> indexed texts
+        # Sorted views of the indexed tokens, built on demand and reset when tokens come or go
+        self._sorted_tokens: Optional[List[str]] = None
+        self._sorted_reversed_tokens: Optional[List[str]] = None
+        self._title_lower: Dict[UUID, str] = {}  # thread_id -> lowercased title
+        self._content_lower: Dict[UUID, str] = {}  # message_id -> lowercased content
+        self._message_tokens: Dict[UUID, FrozenSet[str]] = {}  # message_id -> indexed tokens
+        self.thread_messages: Dict[UUID, Deque[AgentMessage]] = {}  # thread_id -> recent messages
+        self._retained_ids: Dict[UUID, Counter] = {}  # thread_id -> copies of each message ID held
         
         # Context management
         self.conversation_contexts: Dict[UUID, ConversationContext] = {}
+        self._closed_context_ids: Set[UUID] = set()  # inactive threads whose context awaits cleanup
         
     async def create_thread(
         self,
@@ -92,32 +136,35 @@ class ConversationManager:
         
         # Store thread
         self.threads[thread_id] = thread
+        self._active_thread_count += 1
+        self._push_activity(thread_id, thread.last_activity)
+        self._mono_activity[thread_id] = time.monotonic()
         
         # Add to topic threads
-        if topic not in self.topic_threads:
-            self.topic_threads[topic] = []
         self.topic_threads[topic].append(thread_id)
+        self.active_thread_by_topic[topic] = thread_id
         
         # Add to agent threads
-        if initial_message.sender_id not in self.agent_threads:
-            self.agent_threads[initial_message.sender_id] = set()
         self.agent_threads[initial_message.sender_id].add(thread_id)
         
         # Store initial message
-        self.thread_messages[thread_id] = [initial_message]
-        self.message_threads[str(initial_message.id)] = thread_id
+        self._append_thread_message(thread_id, initial_message)
+        self.message_threads[initial_message.id] = thread_id
+        if thread.title:
+            self._title_lower[thread_id] = thread.title.lower()
+            self._index_text(thread_id, self._title_lower[thread_id])
         
         # Create context
         context = ConversationContext(
             thread_id=thread_id,
             topic=topic,
-            recent_messages=[initial_message],
+            recent_messages=deque([initial_message], maxlen=self.max_context_messages),
             participants={initial_message.sender_id},
             thread_title=thread.title
         )
         self.conversation_contexts[thread_id] = context
         
-        logger.info(f"Created conversation thread {thread_id} in topic {topic}")
+        logger.info("Created conversation thread %s in topic %s", thread_id, topic)
         return thread
     
     async def add_message_to_thread(
@@ -138,30 +185,103 @@ class ConversationManager:
         if thread_id is None:
             thread_id = await self._find_or_create_thread(message)
         
-        # Add message to thread
-        if thread_id not in self.thread_messages:
-            self.thread_messages[thread_id] = []
+        self._record_messages(thread_id, [message])
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Added message %s to thread %s", message.id, thread_id)
+        return thread_id
+    
+    async def add_messages_to_thread(self, messages: List[AgentMessage]) -> Dict[UUID, List[UUID]]:
+        """Add a batch of messages to their conversation threads.
+        
+        Messages are grouped by thread so that thread, agent and context
+        bookkeeping happens once per thread rather than once per message.
+        
+        Args:
+            messages: Messages to add, in arrival order
+        
+        Returns:
+            Dictionary mapping thread IDs to the IDs of the messages added to them
+        """
+        by_thread: Dict[UUID, List[AgentMessage]] = defaultdict(list)
+        for message in messages:
+            by_thread[await self._find_or_create_thread(message)].append(message)
+        
+        for thread_id, batch in by_thread.items():
+            self._record_messages(thread_id, batch)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Added %d messages to %d threads", len(messages), len(by_thread))
+        return {thread_id: [m.id for m in batch] for thread_id, batch in by_thread.items()}
+    
+    def _record_messages(self, thread_id: UUID, batch: List[AgentMessage]) -> None:
+        """Store messages in a thread and update its thread, agent and context state.
+        
+        Args:
+            thread_id: Thread ID
+            batch: Non-empty list of messages, in arrival order
+        """
+        # Add messages to thread
+        for message in batch:
+            self._append_thread_message(thread_id, message)
+            self.message_threads[message.id] = thread_id
         
-        self.thread_messages[thread_id].append(message)
-        self.message_threads[str(message.id)] = thread_id
+        senders = {message.sender_id for message in batch}
+        last_activity = batch[-1].timestamp
         
         # Update thread
-        if thread_id in self.threads:
-            thread = self.threads[thread_id]
-            thread.participants.add(message.sender_id)
-            thread.message_count += 1
-            thread.last_activity = message.timestamp
+        thread = self.threads.get(thread_id)
+        if thread is not None:
+            thread.participants.update(senders)
+            thread.message_count += len(batch)
+            thread.last_activity = last_activity
+            if last_activity < self._heap_activity.get(thread_id, last_activity):
+                # Out-of-order timestamps moved the activity back; requeue earlier
+                self._push_activity(thread_id, last_activity)
+            self._mono_activity[thread_id] = time.monotonic()
             
             # Update agent threads
-            if message.sender_id not in self.agent_threads:
-                self.agent_threads[message.sender_id] = set()
-            self.agent_threads[message.sender_id].add(thread_id)
-        
-        # Update context
-        await self._update_conversation_context(thread_id, message)
+            for sender_id in senders:
+                self.agent_threads[sender_id].add(thread_id)
+        
+        # Update context (the bounded deque keeps only the most recent messages)
+        context = self.conversation_contexts.get(thread_id)
+        if context is not None:
+            context.recent_messages.extend(batch[-self.max_context_messages:])
+            context.participants.update(senders)
+            context.last_activity = last_activity
+    
+    def _append_thread_message(self, thread_id: UUID, message: AgentMessage) -> None:
+        """Append and index a message in a thread's bounded history.
         
-        logger.debug(f"Added message {message.id} to thread {thread_id}")
-        return thread_id
+        The oldest message is evicted and unindexed if the history is full.
+        """
+        messages = self.thread_messages.get(thread_id)
+        if messages is None:
+            messages = self.thread_messages[thread_id] = deque(maxlen=self.max_context_messages * 2)
+            self._retained_ids[thread_id] = Counter()
+        retained_ids = self._retained_ids[thread_id]
+        
+        if messages and len(messages) == messages.maxlen:
+            evicted = messages.popleft()
+            self._total_message_count -= 1
+            self._evicted_message_count += 1
+            
+            self._remove_tokens(thread_id, self._message_tokens[evicted.id])
+            
+            # Forget the evicted message unless a retained copy still refers to it
+            retained_ids[evicted.id] -= 1
+            if not retained_ids[evicted.id]:
+                del retained_ids[evicted.id]
+                self._content_lower.pop(evicted.id, None)
+                self._message_tokens.pop(evicted.id, None)
+                if self.message_threads.get(evicted.id) == thread_id:
+                    del self.message_threads[evicted.id]
+        
+        messages.append(message)
+        retained_ids[message.id] += 1
+        self._total_message_count += 1
+        self._index_message(thread_id, message)
     
     async def _find_or_create_thread(self, message: AgentMessage) -> UUID:
         """Find existing thread or create new one for a message.
@@ -172,44 +292,19 @@ class ConversationManager:
         Returns:
             Thread ID
         """
-        # Check for existing active threads in the topic
-        if message.topic in self.topic_threads:
-            for thread_id in self.topic_threads[message.topic]:
-                if thread_id in self.threads and self.threads[thread_id].is_active:
-                    # Check if thread is still active (recent activity)
-                    thread = self.threads[thread_id]
-                    if datetime.utcnow() - thread.last_activity < self.thread_timeout:
-                        return thread_id
+        # Reuse the topic's current thread if it is still active
+        thread_id = self.active_thread_by_topic.get(message.topic)
+        if thread_id is not None:
+            thread = self.threads.get(thread_id)
+            if (thread is not None and thread.is_active and
+                    time.monotonic() - self._mono_activity[thread_id] < self._thread_timeout_secs):
+                return thread_id
+            del self.active_thread_by_topic[message.topic]
         
         # Create new thread
         thread = await self.create_thread(message.topic, message)
         return thread.thread_id
     
-    async def _update_conversation_context(self, thread_id: UUID, message: AgentMessage) -> None:
-        """Update conversation context for a thread.
-        
-        Args:
-            thread_id: Thread ID
-            message: New message
-        """
-        if thread_id not in self.conversation_contexts:
-            return
-        
-        context = self.conversation_contexts[thread_id]
-        
-        # Add message to recent messages
-        context.recent_messages.append(message)
-        
-        # Keep only recent messages
-        if len(context.recent_messages) > self.max_context_messages:
-            context.recent_messages = context.recent_messages[-self.max_context_messages:]
-        
-        # Update participants
-        context.participants.add(message.sender_id)
-        
-        # Update activity
-        context.last_activity = message.timestamp
-    
     def _generate_thread_title(self, message: AgentMessage) -> str:
         """Generate a thread title from a message.
         
@@ -226,7 +321,7 @@ class ConversationManager:
         else:
             return content[:47] + "..."
     
-    async def get_conversation_context(self, thread_id: UUID) -> Optional[ConversationContext]:
+    def get_conversation_context(self, thread_id: UUID) -> Optional[ConversationContext]:
         """Get conversation context for a thread.
         
         Args:
@@ -237,7 +332,7 @@ class ConversationManager:
         """
         return self.conversation_contexts.get(thread_id)
     
-    async def get_thread_messages(
+    def get_thread_messages(
         self,
         thread_id: UUID,
         limit: Optional[int] = None
@@ -251,38 +346,38 @@ class ConversationManager:
         Returns:
             List of messages
         """
-        messages = self.thread_messages.get(thread_id, [])
+        messages = list(self.thread_messages.get(thread_id, ()))
         
         if limit:
             messages = messages[-limit:]
         
         return messages
     
-    async def get_agent_threads(self, agent_id: str) -> List[ConversationThread]:
+    def get_agent_threads(self, agent_id: str) -> Iterator[ConversationThread]:
         """Get threads for an agent.
         
         Args:
             agent_id: Agent ID
             
         Returns:
-            List of threads
+            Lazy iterator over the threads; call list() to materialize it
         """
-        thread_ids = self.agent_threads.get(agent_id, set())
-        return [self.threads[tid] for tid in thread_ids if tid in self.threads]
+        thread_ids = self.agent_threads.get(agent_id, ())
+        return (self.threads[tid] for tid in thread_ids if tid in self.threads)
     
-    async def get_topic_threads(self, topic: str) -> List[ConversationThread]:
+    def get_topic_threads(self, topic: str) -> Iterator[ConversationThread]:
         """Get threads for a topic.
         
         Args:
             topic: Topic name
             
         Returns:
-            List of threads
+            Lazy iterator over the threads; call list() to materialize it
         """
-        thread_ids = self.topic_threads.get(topic, [])
-        return [self.threads[tid] for tid in thread_ids if tid in self.threads]
+        thread_ids = self.topic_threads.get(topic, ())
+        return (self.threads[tid] for tid in thread_ids if tid in self.threads)
     
-    async def close_thread(self, thread_id: UUID, closed_by: str) -> bool:
+    def close_thread(self, thread_id: UUID, closed_by: str) -> bool:
         """Close a conversation thread.
         
         Args:
@@ -292,16 +387,31 @@ class ConversationManager:
         Returns:
             True if successful, False otherwise
         """
-        if thread_id not in self.threads:
+        thread = self.threads.get(thread_id)
+        if thread is None:
             return False
         
-        thread = self.threads[thread_id]
-        thread.is_active = False
+        self._deactivate_thread(thread)
         
-        logger.info(f"Closed thread {thread_id} by agent {closed_by}")
+        logger.info("Closed thread %s by agent %s", thread_id, closed_by)
         return True
     
-    async def archive_old_threads(self) -> int:
+    def _deactivate_thread(self, thread: ConversationThread) -> None:
+        """Mark a thread inactive and drop the topic's pointer to it."""
+        if not thread.is_active:
+            return
+        thread.is_active = False
+        self._active_thread_count -= 1
+        self._closed_context_ids.add(thread.thread_id)
+        if self.active_thread_by_topic.get(thread.topic) == thread.thread_id:
+            del self.active_thread_by_topic[thread.topic]
+    
+    def _push_activity(self, thread_id: UUID, last_activity: datetime) -> None:
+        """Queue a thread for archiving, superseding its previous entry."""
+        heapq.heappush(self._activity_heap, (last_activity, thread_id))
+        self._heap_activity[thread_id] = last_activity
+    
+    def archive_old_threads(self) -> int:
         """Archive old inactive threads.
         
         Returns:
@@ -310,13 +420,25 @@ class ConversationManager:
         archived_count = 0
         cutoff_time = datetime.utcnow() - self.thread_timeout
         
-        for thread_id, thread in self.threads.items():
-            if thread.is_active and thread.last_activity < cutoff_time:
-                thread.is_active = False
-                archived_count += 1
+        heap = self._activity_heap
+        while heap and heap[0][0] < cutoff_time:
+            last_activity, thread_id = heapq.heappop(heap)
+            if self._heap_activity.get(thread_id) != last_activity:
+                continue  # superseded by an earlier entry
+            thread = self.threads.get(thread_id)
+            if not thread or not thread.is_active:
+                del self._heap_activity[thread_id]
+                continue
+            if thread.last_activity != last_activity:
+                # The thread saw messages since this entry was pushed
+                self._push_activity(thread_id, thread.last_activity)
+                continue
+            del self._heap_activity[thread_id]
+            self._deactivate_thread(thread)
+            archived_count += 1
         
         if archived_count > 0:
-            logger.info(f"Archived {archived_count} old threads")
+            logger.info("Archived %d old threads", archived_count)
         
         return archived_count
     
@@ -324,7 +446,8 @@ class ConversationManager:
         self,
         query: str,
         topic: Optional[str] = None,
-        agent_id: Optional[str] = None
+        agent_id: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> List[ConversationThread]:
         """Search for threads by content.
         
@@ -332,6 +455,7 @@ class ConversationManager:
             query: Search query
             topic: Optional topic filter
             agent_id: Optional agent filter
+            limit: Optional maximum number of threads to return
             
         Returns:
             List of matching threads
@@ -340,48 +464,220 @@ class ConversationManager:
         query_lower = query.lower()
         
         # Get candidate threads
-        candidate_threads = []
         if topic:
-            candidate_threads = await self.get_topic_threads(topic)
+            candidate_threads = self.get_topic_threads(topic)
         elif agent_id:
-            candidate_threads = await self.get_agent_threads(agent_id)
+            candidate_threads = self.get_agent_threads(agent_id)
         else:
-            candidate_threads = list(self.threads.values())
+            candidate_threads = iter(self.threads.values())
         
-        # Search in thread content
+        # Narrow the candidates with the token index before scanning content
+        indexed_ids = self._indexed_candidates(query_lower)
+        if indexed_ids is not None:
+            candidate_threads = (t for t in candidate_threads if t.thread_id in indexed_ids)
+        
+        # Confirm matches in thread content
         for thread in candidate_threads:
-            # Search in title
-            if thread.title and query_lower in thread.title.lower():
+            # Search in title, then in messages
+            matched = query_lower in self._title_lower.get(thread.thread_id, "") or any(
+                query_lower in (self._content_lower.get(message.id) or message.content.lower())
+                for message in self.thread_messages.get(thread.thread_id, ())
+            )
+            if matched:
                 matching_threads.append(thread)
-                continue
-            
-            # Search in messages
-            messages = await self.get_thread_messages(thread.thread_id)
-            for message in messages:
-                if query_lower in message.content.lower():
-                    matching_threads.append(thread)
+                if limit is not None and len(matching_threads) >= limit:
                     break
         
         return matching_threads
     
-    async def get_thread_stats(self) -> Dict[str, Any]:
+    async def batch_search_threads(
+        self,
+        queries: List[str],
+        topic: Optional[str] = None,
+        agent_id: Optional[str] = None
+    ) -> Dict[str, List[ConversationThread]]:
+        """Search for threads matching any of several queries in one pass.
+        
+        With pyahocorasick installed, all queries are compiled into a single
+        automaton so each title and message is scanned once for every query;
+        otherwise each query is searched separately with search_threads.
+        
+        Args:
+            queries: Search queries
+            topic: Optional topic filter
+            agent_id: Optional agent filter
+        
+        Returns:
+            Dictionary mapping each query to its matching threads
+        """
+        if ahocorasick is None or not all(queries):
+            return {query: await self.search_threads(query, topic, agent_id) for query in queries}
+        
+        # Queries that only differ in case share one automaton entry
+        queries_by_lower: Dict[str, List[str]] = defaultdict(list)
+        for query in queries:
+            queries_by_lower[query.lower()].append(query)
+        
+        automaton = ahocorasick.Automaton()
+        for query_lower in queries_by_lower:
+            automaton.add_word(query_lower, query_lower)
+        automaton.make_automaton()
+        
+        if topic:
+            candidate_threads = self.get_topic_threads(topic)
+        elif agent_id:
+            candidate_threads = self.get_agent_threads(agent_id)
+        else:
+            candidate_threads = iter(self.threads.values())
+        
+        matches: Dict[str, List[ConversationThread]] = {q: [] for q in queries_by_lower}
+        for thread in candidate_threads:
+            texts = [self._title_lower.get(thread.thread_id, "")]
+            texts.extend(
+                self._content_lower.get(message.id) or message.content.lower()
+                for message in self.thread_messages.get(thread.thread_id, ())
+            )
+            
+            found: Set[str] = set()
+            for text in texts:
+                found.update(query_lower for _, query_lower in automaton.iter(text))
+                if len(found) == len(queries_by_lower):
+                    break
+            for query_lower in found:
+                matches[query_lower].append(thread)
+        
+        return {
+            query: list(matches[query_lower])
+            for query_lower, originals in queries_by_lower.items()
+            for query in originals
+        }
+    
+    def _index_message(self, thread_id: UUID, message: AgentMessage) -> None:
+        """Cache a message's lowercased content and add it to the search index."""
+        content_lower = message.content.lower()
+        self._content_lower[message.id] = content_lower
+        tokens = self._message_tokens[message.id] = frozenset(_TOKEN_RE.findall(content_lower))
+        self._add_tokens(thread_id, tokens)
+    
+    def _index_text(self, thread_id: UUID, text_lower: str) -> None:
+        """Add the tokens of a lowercased title to the search index."""
+        self._add_tokens(thread_id, set(_TOKEN_RE.findall(text_lower)))
+    
+    def _add_tokens(self, thread_id: UUID, tokens: Iterable[str]) -> None:
+        """Count one more indexed text containing each of the distinct tokens."""
+        counts = self._thread_tokens.get(thread_id)
+        if counts is None:
+            counts = self._thread_tokens[thread_id] = {}
+        
+        token_to_threads = self._token_to_threads
+        for token in tokens:
+            count = counts.get(token, 0)
+            counts[token] = count + 1
+            if count:
+                continue
+            thread_ids = token_to_threads.get(token)
+            if thread_ids is None:
+                thread_ids = token_to_threads[token] = set()
+                self._sorted_tokens = self._sorted_reversed_tokens = None
+            thread_ids.add(thread_id)
+    
+    def _remove_tokens(self, thread_id: UUID, tokens: Iterable[str]) -> None:
+        """Count one fewer indexed text containing each token, dropping unused postings."""
+        counts = self._thread_tokens[thread_id]
+        token_to_threads = self._token_to_threads
+        for token in tokens:
+            count = counts[token] - 1
+            if count:
+                counts[token] = count
+                continue
+            del counts[token]
+            thread_ids = token_to_threads[token]
+            if len(thread_ids) > 1:
+                thread_ids.discard(thread_id)
+            else:
+                del token_to_threads[token]
+                self._sorted_tokens = self._sorted_reversed_tokens = None
+    
+    def _tokens_with_prefix(self, prefix: str) -> Iterator[str]:
+        """Yield the indexed tokens starting with prefix."""
+        tokens = self._sorted_tokens
+        if tokens is None:
+            tokens = self._sorted_tokens = sorted(self._token_to_threads)
+        for i in range(bisect.bisect_left(tokens, prefix), len(tokens)):
+            if not tokens[i].startswith(prefix):
+                break
+            yield tokens[i]
+    
+    def _tokens_with_suffix(self, suffix: str) -> Iterator[str]:
+        """Yield the indexed tokens ending with suffix."""
+        reversed_tokens = self._sorted_reversed_tokens
+        if reversed_tokens is None:
+            reversed_tokens = self._sorted_reversed_tokens = sorted(
+                token[::-1] for token in self._token_to_threads
+            )
+        reversed_suffix = suffix[::-1]
+        for i in range(bisect.bisect_left(reversed_tokens, reversed_suffix), len(reversed_tokens)):
+            if not reversed_tokens[i].startswith(reversed_suffix):
+                break
+            yield reversed_tokens[i][::-1]
+    
+    def _indexed_candidates(self, query_lower: str) -> Optional[Set[UUID]]:
+        """Get the threads that can contain a query according to the token index.
+        
+        A query token touching one end of the query may be only part of a
+        word in the matched text, so it is matched against the indexed tokens
+        by prefix or suffix, bisecting sorted views of the vocabulary. A token
+        touching both ends can sit anywhere inside a word and does not narrow
+        the candidates.
+        
+        Args:
+            query_lower: Lowercased search query
+        
+        Returns:
+            Superset of the matching thread IDs, or None if the query has no
+            tokens to look up
+        """
+        candidate_ids: Optional[Set[UUID]] = None
+        for match in _TOKEN_RE.finditer(query_lower):
+            token = match.group()
+            starts_word = match.start() > 0
+            ends_word = match.end() < len(query_lower)
+            
+            if starts_word and ends_word:
+                indexed_tokens = (token,)
+            elif starts_word:
+                indexed_tokens = self._tokens_with_prefix(token)
+            elif ends_word:
+                indexed_tokens = self._tokens_with_suffix(token)
+            else:
+                continue
+            
+            postings: Set[UUID] = set()
+            for indexed in indexed_tokens:
+                postings.update(self._token_to_threads.get(indexed, ()))
+            
+            candidate_ids = postings if candidate_ids is None else candidate_ids & postings
+            if not candidate_ids:
+                break
+        
+        return candidate_ids
+    
+    def get_thread_stats(self) -> Dict[str, Any]:
         """Get conversation thread statistics.
         
         Returns:
             Dictionary with thread statistics
         """
         total_threads = len(self.threads)
-        active_threads = len([t for t in self.threads.values() if t.is_active])
+        active_threads = self._active_thread_count
         
-        total_messages = sum(len(msgs) for msgs in self.thread_messages.values())
+        total_messages = self._total_message_count
         
         # Average messages per thread
         avg_messages_per_thread = total_messages / total_threads if total_threads > 0 else 0
         
         # Threads by topic
-        topic_counts = {}
-        for thread in self.threads.values():
-            topic_counts[thread.topic] = topic_counts.get(thread.topic, 0) + 1
+        topic_counts = {topic: len(thread_ids) for topic, thread_ids in self.topic_threads.items()}
         
         return {
             "total_threads": total_threads,
@@ -406,19 +702,16 @@ class ConversationManager:
         }
         
         # Archive old threads
-        cleanup_stats["archived_threads"] = await self.archive_old_threads()
+        cleanup_stats["archived_threads"] = self.archive_old_threads()
         
         # Remove contexts for archived threads
-        for thread_id, thread in self.threads.items():
-            if not thread.is_active and thread_id in self.conversation_contexts:
-                del self.conversation_contexts[thread_id]
+        for thread_id in self._closed_context_ids:
+            if self.conversation_contexts.pop(thread_id, None) is not None:
                 cleanup_stats["removed_contexts"] += 1
+        self._closed_context_ids.clear()
         
-        # Remove old messages (keep only recent ones)
-        for thread_id, messages in self.thread_messages.items():
-            if len(messages) > self.max_context_messages * 2:
-                old_count = len(messages)
-                self.thread_messages[thread_id] = messages[-self.max_context_messages:]
-                cleanup_stats["removed_messages"] += old_count - len(self.thread_messages[thread_id])
+        # Thread histories are bounded on append; report what they evicted
+        cleanup_stats["removed_messages"] = self._evicted_message_count
+        self._evicted_message_count = 0
         
         return cleanup_stats
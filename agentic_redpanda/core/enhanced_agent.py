@@ -1,21 +1,27 @@
 """Enhanced agent with advanced communication features."""
 
 import asyncio
+import functools
 import logging
-from typing import Any, Dict, List, Optional, Set, Callable
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
 from datetime import datetime
 
 from ..providers.base import LLMProvider
 from ..schemas.message import AgentMessage, MessageType, MessagePriority
-from .message_broker import MessageBroker
+from .message_broker import MessageBroker, STOP_DRAINING, drain_batches
 from .subscription_manager import SubscriptionManager, SubscriptionType, SubscriptionFilter
 from .message_router import MessageRouter, RoutingRuleType
 from .topic_validator import TopicValidator, TopicType, PermissionLevel
-from .error_handler import ErrorHandler, RetryConfig, RetryStrategy
+from .error_handler import MessageErrorHandler, RetryConfig, RetryStrategy
 from .conversation_manager import ConversationManager, ConversationContext
 
 logger = logging.getLogger(__name__)
 
+# Message types whose default handlers use the conversation context
+_CONTEXT_TYPES = frozenset({MessageType.TEXT, MessageType.QUERY})
+
 
 class EnhancedAgent:
     """Enhanced agent with advanced communication capabilities."""
@@ -47,6 +53,7 @@ class EnhancedAgent:
         self.llm_provider = llm_provider
         self.message_broker = message_broker
         self.config = config or {}
+        self._system_prefix = f"You are {agent_name}, a {role} agent. Respond helpfully and concisely."
         
         # Initialize managers
         self.subscription_manager = SubscriptionManager()
@@ -59,10 +66,14 @@ class EnhancedAgent:
             max_retries=self.config.get("max_retries", 3),
             strategy=RetryStrategy(self.config.get("retry_strategy", "exponential_backoff"))
         )
-        self.error_handler = ErrorHandler(retry_config)
+        self.error_handler = MessageErrorHandler(retry_config)
         
         # Topic management
         self.subscribed_topics: Set[str] = set(topics or [])
+        self._default_sub_filter = SubscriptionFilter(
+            allowed_roles=frozenset({self.role, "general"}),
+            min_priority=MessagePriority.LOW
+        )
         self.running = False
         
         # Message handling
@@ -72,50 +83,78 @@ class EnhancedAgent:
             MessageType.QUERY: self._handle_query_message,
             MessageType.NOTIFICATION: self._handle_notification_message,
         }
+        # Bound once so every subscription shares the same callback
+        self._message_handler: Callable[[AgentMessage], None] = self._dispatch_message
+        self._handler_tasks: Set[asyncio.Task] = set()  # messages being handled
         
         # Agent state
-        self.conversation_history: List[Dict[str, str]] = []
+        self.conversation_history: Deque[Dict[str, str]] = deque(
+            maxlen=self.config.get("history_limit", 512)
+        )
         self.last_activity = None
         
-        # Setup default routing rules
-        self._setup_default_routing_rules()
+        # Outgoing message batching
+        self.max_batch_size: int = self.config.get("max_batch_size", 64)
+        self.max_delay_ms: int = self.config.get("max_delay_ms", 10)
+        self._pub_queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._publish_tasks: Set[asyncio.Task] = set()
+        
+        # LRU of topic -> READ permission, valid for one topic_validator.permissions_version
+        self.permission_cache_size: int = self.config.get("permission_cache_size", 1024)
+        self._perm_cache: "OrderedDict[str, bool]" = OrderedDict()
+        self._perm_cache_version = -1
     
-    def _setup_default_routing_rules(self) -> None:
+    async def _setup_default_routing_rules(self) -> None:
         """Set up default routing rules for the agent."""
-        # Route high priority messages to urgent topics
-        asyncio.create_task(self.message_router.add_routing_rule(
-            rule_id="high_priority_urgent",
-            rule_type=RoutingRuleType.PRIORITY,
-            condition=MessagePriority.HIGH,
-            target_topics=["urgent", "alerts"],
-            priority=100,
-            description="Route high priority messages to urgent topics"
-        ))
+        # Installed on the first start only
+        if await self.message_router.get_rule_by_id("high_priority_urgent"):
+            return
         
-        # Route task messages to task topics
-        asyncio.create_task(self.message_router.add_routing_rule(
-            rule_id="task_routing",
-            rule_type=RoutingRuleType.MESSAGE_TYPE,
-            condition=MessageType.TASK,
-            target_topics=["tasks", "work"],
-            priority=50,
-            description="Route task messages to task topics"
-        ))
+        await asyncio.gather(
+            # Route high priority messages to urgent topics
+            self.message_router.add_routing_rule(
+                rule_id="high_priority_urgent",
+                rule_type=RoutingRuleType.PRIORITY,
+                condition=MessagePriority.HIGH,
+                target_topics=["urgent", "alerts"],
+                priority=100,
+                description="Route high priority messages to urgent topics"
+            ),
+            # Route task messages to task topics
+            self.message_router.add_routing_rule(
+                rule_id="task_routing",
+                rule_type=RoutingRuleType.MESSAGE_TYPE,
+                condition=MessageType.TASK,
+                target_topics=["tasks", "work"],
+                priority=50,
+                description="Route task messages to task topics"
+            ),
+        )
     
     async def start(self) -> None:
         """Start the enhanced agent."""
         try:
-            # Validate LLM provider
-            if not await self.llm_provider.health_check():
+            # Validate LLM provider while installing the default routing rules
+            _, healthy = await asyncio.gather(
+                self._setup_default_routing_rules(),
+                self.llm_provider.health_check()
+            )
+            if not healthy:
                 raise RuntimeError("LLM provider is not healthy")
             
             # Start message broker if not already started
             if not self.message_broker.running:
                 await self.message_broker.start()
             
-            # Subscribe to topics with advanced filtering
-            for topic in self.subscribed_topics:
-                await self._subscribe_to_topic_advanced(topic)
+            # Subscribe to topics with advanced filtering, concurrently
+            await asyncio.gather(*(
+                self._subscribe_to_topic_advanced(topic) for topic in list(self.subscribed_topics)
+            ))
+            
+            # Start the outgoing message flusher
+            self._pub_queue = asyncio.Queue()
+            self._flush_task = asyncio.create_task(self._flush_loop())
             
             self.running = True
             logger.info(f"Enhanced agent {self.agent_name} ({self.agent_id}) started")
@@ -128,6 +167,22 @@ class EnhancedAgent:
         """Stop the enhanced agent."""
         self.running = False
         
+        # Let in-flight message handlers finish so their replies are flushed
+        if self._handler_tasks:
+            await asyncio.gather(*self._handler_tasks, return_exceptions=True)
+        
+        # Flush pending outgoing messages
+        if self._flush_task:
+            await self._pub_queue.put(STOP_DRAINING)
+            await self._flush_task
+            self._flush_task = None
+            self._pub_queue = None
+        
+        # Wait for direct publishes still in flight, and the error reports of
+        # those that fail
+        while self._publish_tasks:
+            await asyncio.gather(*self._publish_tasks, return_exceptions=True)
+        
         # Unsubscribe from all topics
         for topic in list(self.subscribed_topics):
             await self.subscription_manager.unsubscribe_agent_from_topic(self.agent_id, topic)
@@ -181,11 +236,46 @@ class EnhancedAgent:
         return str(message.id)
     
     async def _send_to_topic(self, message: AgentMessage, topic: str) -> None:
-        """Send message to a specific topic with error handling."""
-        try:
-            await self.message_broker.publish_message(message)
-        except Exception as e:
-            await self.error_handler.handle_message_error(e, message, "publish")
+        """Queue a message for publishing, or publish it in the background if not started."""
+        if self._pub_queue is not None:
+            await self._pub_queue.put(message)
+            return
+        
+        task = asyncio.ensure_future(self.message_broker.publish_message(message))
+        self._publish_tasks.add(task)
+        task.add_done_callback(functools.partial(self._on_publish_done, message))
+    
+    def _on_publish_done(self, message: AgentMessage, task: asyncio.Task) -> None:
+        """Hand a failed background publish to the error handler."""
+        self._publish_tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            report = asyncio.ensure_future(
+                self.error_handler.handle_message_error(error, message, "publish")
+            )
+            self._publish_tasks.add(report)
+            report.add_done_callback(self._publish_tasks.discard)
+    
+    async def _flush_loop(self) -> None:
+        """Drain the publish queue into batched broker publishes."""
+        await drain_batches(
+            self._pub_queue,
+            self.max_batch_size,
+            self.max_delay_ms / 1000,
+            self.message_broker.publish_batch,
+            self._on_batch_error
+        )
+    
+    async def _on_batch_error(self, error: Exception, batch: List[AgentMessage]) -> None:
+        """Report a batch that failed to publish to the error handler."""
+        await self.error_handler.handle_error(error, context={
+            "agent_id": self.agent_id,
+            "operation": "publish_batch",
+            "batch_size": len(batch),
+            "message_ids": [str(m.id) for m in batch],
+        })
     
     async def subscribe_to_topic_advanced(
         self,
@@ -204,8 +294,7 @@ class EnhancedAgent:
             True if successful, False otherwise
         """
         try:
-            # Create custom handler
-            handler = lambda msg: asyncio.create_task(self._handle_message_advanced(msg))
+            handler = self._message_handler
             
             # Subscribe with advanced filtering
             await self.subscription_manager.subscribe_agent_to_topic(
@@ -232,16 +321,10 @@ class EnhancedAgent:
     
     async def _subscribe_to_topic_advanced(self, topic: str) -> None:
         """Internal method to subscribe to a topic with default settings."""
-        # Create role-based filter
-        filter_criteria = SubscriptionFilter(
-            allowed_roles={self.role, "general"},
-            min_priority=MessagePriority.LOW
-        )
-        
         await self.subscribe_to_topic_advanced(
             topic=topic,
             subscription_type=SubscriptionType.ROLE_BASED,
-            filter_criteria=filter_criteria
+            filter_criteria=self._default_sub_filter
         )
     
     async def create_topic_advanced(
@@ -296,6 +379,12 @@ class EnhancedAgent:
             logger.error(f"Failed to create topic {topic_name}: {e}")
             return False
     
+    def _dispatch_message(self, message: AgentMessage) -> None:
+        """Schedule handling of a message delivered by a synchronous callback."""
+        task = asyncio.get_running_loop().create_task(self._handle_message_advanced(message))
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+    
     async def _handle_message_advanced(self, message: AgentMessage) -> None:
         """Handle incoming messages with advanced features."""
         try:
@@ -304,17 +393,20 @@ class EnhancedAgent:
                 return
             
             # Check permissions
-            if not await self.topic_validator.check_permission(
-                topic=message.topic,
-                agent_id=self.agent_id,
-                required_permission=PermissionLevel.READ
-            ):
+            if not await self._can_read(message.topic):
                 logger.warning(f"No permission to read topic {message.topic}")
                 return
             
-            # Get conversation context
-            thread_id = await self.conversation_manager.add_message_to_thread(message)
-            context = await self.conversation_manager.get_conversation_context(thread_id)
+            # Thread the message once, even if it arrives on several routed
+            # topics; only build context for types that use it
+            conversation_manager = self.conversation_manager
+            message_type = message.message_type
+            thread_id = conversation_manager.message_threads.get(message.id)
+            if thread_id is None:
+                thread_id = await conversation_manager.add_message_to_thread(message)
+            context = None
+            if message_type in _CONTEXT_TYPES:
+                context = conversation_manager.get_conversation_context(thread_id)
             
             # Update conversation history
             self.conversation_history.append({
@@ -322,12 +414,12 @@ class EnhancedAgent:
                 "content": f"[{message.sender_name}] {message.content}"
             })
             
-            # Route to appropriate handler
-            handler = self.message_handlers.get(message.message_type)
-            if handler:
-                await handler(message, context)
+            # Route to appropriate handler; the default notification handler runs inline
+            handler = self.message_handlers.get(message_type, self._handle_unknown_message)
+            if getattr(handler, "__func__", None) is EnhancedAgent._handle_notification_message:
+                self._handle_notification_sync(message, context)
             else:
-                logger.warning(f"No handler for message type {message.message_type}")
+                await handler(message, context)
             
             # Update last activity
             self.last_activity = message.timestamp
@@ -335,6 +427,43 @@ class EnhancedAgent:
         except Exception as e:
             await self.error_handler.handle_message_error(e, message, "handle")
     
+    async def _can_read(self, topic: str) -> bool:
+        """Check READ permission for a topic, using the permission cache."""
+        version = self.topic_validator.permissions_version
+        if version != self._perm_cache_version:
+            self._perm_cache.clear()
+            self._perm_cache_version = version
+        
+        allowed = self._perm_cache.get(topic)
+        if allowed is not None:
+            self._perm_cache.move_to_end(topic)
+            return allowed
+        
+        allowed = await self.topic_validator.check_permission(
+            topic=topic,
+            agent_id=self.agent_id,
+            required_permission=PermissionLevel.READ
+        )
+        self._perm_cache[topic] = allowed
+        if len(self._perm_cache) > self.permission_cache_size:
+            self._perm_cache.popitem(last=False)
+        return allowed
+    
+    def invalidate_permission(self, topic: Optional[str] = None) -> None:
+        """Drop cached permission checks for a topic, or for all topics.
+        
+        Grants and revokes made through the topic validator are picked up
+        automatically; this is only needed after editing its permissions
+        directly.
+        
+        Args:
+            topic: Topic to invalidate, or None to clear the whole cache
+        """
+        if topic is None:
+            self._perm_cache.clear()
+        else:
+            self._perm_cache.pop(topic, None)
+    
     async def _handle_text_message(self, message: AgentMessage, context: Optional[ConversationContext] = None) -> None:
         """Handle text messages with conversation context."""
         # Generate response with context
@@ -367,8 +496,16 @@ class EnhancedAgent:
             reply_to=message.sender_id
         )
     
+    async def _handle_unknown_message(self, message: AgentMessage, context: Optional[ConversationContext] = None) -> None:
+        """Handle messages of a type with no registered handler."""
+        logger.warning(f"No handler for message type {message.message_type}")
+    
     async def _handle_notification_message(self, message: AgentMessage, context: Optional[ConversationContext] = None) -> None:
         """Handle notification messages."""
+        self._handle_notification_sync(message, context)
+    
+    def _handle_notification_sync(self, message: AgentMessage, context: Optional[ConversationContext] = None) -> None:
+        """Log a notification without creating a coroutine."""
         logger.info(f"Notification from {message.sender_name}: {message.content}")
     
     async def _generate_contextual_response(
@@ -379,15 +516,16 @@ class EnhancedAgent:
         """Generate a response using conversation context."""
         try:
             # Build context-aware prompt
-            system_message = f"You are {self.agent_name}, a {self.role} agent. Respond helpfully and concisely."
+            system_message = self._system_prefix
             
-            if context and context.recent_messages:
-                # Include recent conversation context
+            recent = context.recent_messages if context else None
+            if recent:
+                # Include the last 5 messages of conversation context
                 context_text = "\n".join([
-                    f"[{msg.sender_name}]: {msg.content}" 
-                    for msg in context.recent_messages[-5:]  # Last 5 messages
+                    f"[{msg.sender_name}]: {msg.content}"
+                    for msg in islice(recent, max(len(recent) - 5, 0), None)
                 ])
-                system_message += f"\n\nRecent conversation context:\n{context_text}"
+                system_message += "\n\nRecent conversation context:\n" + context_text
             
             # Generate response
             response = await self.llm_provider.generate(
@@ -409,6 +547,13 @@ class EnhancedAgent:
     
     async def get_agent_status(self) -> Dict[str, Any]:
         """Get comprehensive agent status."""
+        llm_healthy, subscription_stats, routing_stats, error_stats = await asyncio.gather(
+            self.llm_provider.health_check(),
+            self.subscription_manager.get_subscription_stats(),
+            self.message_router.get_routing_stats(),
+            self.error_handler.get_error_stats()
+        )
+        
         return {
             "agent_id": self.agent_id,
             "agent_name": self.agent_name,
@@ -418,9 +563,9 @@ class EnhancedAgent:
             "conversation_length": len(self.conversation_history),
             "last_activity": self.last_activity,
             "llm_provider": self.llm_provider.__class__.__name__,
-            "llm_healthy": await self.llm_provider.health_check(),
-            "subscription_stats": await self.subscription_manager.get_subscription_stats(),
-            "routing_stats": await self.message_router.get_routing_stats(),
-            "conversation_stats": await self.conversation_manager.get_thread_stats(),
-            "error_stats": await self.error_handler.get_error_stats()
+            "llm_healthy": llm_healthy,
+            "subscription_stats": subscription_stats,
+            "routing_stats": routing_stats,
+            "conversation_stats": self.conversation_manager.get_thread_stats(),
+            "error_stats": error_stats
         }
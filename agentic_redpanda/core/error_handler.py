@@ -1,9 +1,13 @@
 """Error handling and retry logic for agent communication."""
 
 import asyncio
+import functools
+import heapq
 import logging
+import random
 import time
-from typing import Any, Callable, Dict, List, Optional, Type, Union
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Type, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime, timedelta
@@ -73,6 +77,31 @@ class RetryAttempt:
     success: bool = False
 
 
+# Classification rules in priority order: (error type, keywords matched against
+# the lowercased exception class name, keywords matched against the message)
+_CLASSIFICATION_RULES = (
+    (ErrorType.TIMEOUT_ERROR, ("timeout",), ("timeout",)),
+    (ErrorType.NETWORK_ERROR, ("network",), ("connection",)),
+    (ErrorType.MESSAGE_BROKER_ERROR, ("kafka",), ("redpanda",)),
+    (ErrorType.LLM_PROVIDER_ERROR, ("openai", "anthropic"), ("llm",)),
+    (ErrorType.VALIDATION_ERROR, ("validation",), ("invalid",)),
+    (ErrorType.PERMISSION_ERROR, ("permission",), ("unauthorized",)),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _name_rule_index(error_cls: type) -> int:
+    """Get the index of the first rule matching an exception class name.
+    
+    Returns len(_CLASSIFICATION_RULES) if no rule matches the name.
+    """
+    error_name = error_cls.__name__.lower()
+    for index, (_, name_keywords, _) in enumerate(_CLASSIFICATION_RULES):
+        if any(keyword in error_name for keyword in name_keywords):
+            return index
+    return len(_CLASSIFICATION_RULES)
+
+
 class ErrorHandler:
     """Handles errors and implements retry logic."""
     
@@ -83,10 +112,21 @@ class ErrorHandler:
             retry_config: Retry configuration
         """
         self.retry_config = retry_config or RetryConfig()
-        self.error_history: List[ErrorContext] = []
-        self.retry_history: List[RetryAttempt] = []
-        self.max_history_size = 1000
-        
+        self._delay_table = self._build_delay_table()
+        self.error_history: Deque[ErrorContext] = deque(maxlen=1000)
+        self.retry_history: Deque[RetryAttempt] = deque(maxlen=1000)
+    
+    @property
+    def max_history_size(self) -> int:
+        """Maximum number of entries kept in each history."""
+        return self.error_history.maxlen
+    
+    @max_history_size.setter
+    def max_history_size(self, size: int) -> None:
+        # A deque's maxlen is fixed, so resizing keeps the newest entries in new ones
+        self.error_history = deque(self.error_history, maxlen=size)
+        self.retry_history = deque(self.retry_history, maxlen=size)
+    
     async def handle_error(
         self,
         error: Exception,
@@ -131,23 +171,18 @@ class ErrorHandler:
         Returns:
             ErrorType
         """
-        error_name = type(error).__name__.lower()
-        error_message = str(error).lower()
-        
-        if "timeout" in error_name or "timeout" in error_message:
-            return ErrorType.TIMEOUT_ERROR
-        elif "network" in error_name or "connection" in error_message:
-            return ErrorType.NETWORK_ERROR
-        elif "kafka" in error_name or "redpanda" in error_message:
-            return ErrorType.MESSAGE_BROKER_ERROR
-        elif "openai" in error_name or "anthropic" in error_name or "llm" in error_message:
-            return ErrorType.LLM_PROVIDER_ERROR
-        elif "validation" in error_name or "invalid" in error_message:
-            return ErrorType.VALIDATION_ERROR
-        elif "permission" in error_name or "unauthorized" in error_message:
-            return ErrorType.PERMISSION_ERROR
-        else:
-            return ErrorType.UNKNOWN_ERROR
+        # The class name decides per type; only higher-priority rules can
+        # still be matched by the message
+        name_index = _name_rule_index(type(error))
+        if name_index:
+            error_message = str(error).lower()
+            for error_type, _, message_keywords in _CLASSIFICATION_RULES[:name_index]:
+                if any(keyword in error_message for keyword in message_keywords):
+                    return error_type
+        
+        if name_index < len(_CLASSIFICATION_RULES):
+            return _CLASSIFICATION_RULES[name_index][0]
+        return ErrorType.UNKNOWN_ERROR
     
     async def _retry_operation(
         self,
@@ -217,32 +252,39 @@ class ErrorHandler:
             return 0.0
         elif self.retry_config.strategy == RetryStrategy.FIXED_DELAY:
             return self.retry_config.base_delay
-        elif self.retry_config.strategy == RetryStrategy.LINEAR_BACKOFF:
-            delay = self.retry_config.base_delay * (attempt + 1)
-        elif self.retry_config.strategy == RetryStrategy.EXPONENTIAL_BACKOFF:
-            delay = self.retry_config.base_delay * (self.retry_config.backoff_multiplier ** attempt)
+        
+        if attempt < len(self._delay_table):
+            delay = self._delay_table[attempt]
         else:
-            delay = self.retry_config.base_delay
+            delay = self._backoff_delay(attempt)
         
-        # Apply jitter to prevent thundering herd
-        jitter = delay * 0.1 * (0.5 - asyncio.get_event_loop().time() % 1)
-        delay += jitter
+        # Apply +/-5% jitter to prevent thundering herd
+        delay += delay * random.uniform(-0.05, 0.05)
         
         # Cap at max delay
         return min(delay, self.retry_config.max_delay)
     
+    def _backoff_delay(self, attempt: int) -> float:
+        """Get the un-jittered backoff delay for a retry attempt (0-based)."""
+        if self.retry_config.strategy == RetryStrategy.LINEAR_BACKOFF:
+            return self.retry_config.base_delay * (attempt + 1)
+        elif self.retry_config.strategy == RetryStrategy.EXPONENTIAL_BACKOFF:
+            return self.retry_config.base_delay * (self.retry_config.backoff_multiplier ** attempt)
+        return self.retry_config.base_delay
+    
+    def _build_delay_table(self) -> List[float]:
+        """Precompute the backoff delay of every configured retry attempt."""
+        return [self._backoff_delay(attempt) for attempt in range(self.retry_config.max_retries)]
+    
     def _record_error(self, error_context: ErrorContext) -> None:
         """Record an error in the history.
         
         Args:
             error_context: Error context to record
         """
+        # The bounded deque drops the oldest entry once full
         self.error_history.append(error_context)
         
-        # Trim history if too large
-        if len(self.error_history) > self.max_history_size:
-            self.error_history = self.error_history[-self.max_history_size:]
-        
         # Log error
         logger.error(
             f"Error recorded: {error_context.error_type.value} - {error_context.error_message} "
@@ -261,7 +303,7 @@ class ErrorHandler:
         Returns:
             Dictionary with error statistics
         """
-        errors = self.error_history.copy()
+        errors = self.error_history
         
         # Filter by time window
         if time_window:
@@ -302,16 +344,14 @@ class ErrorHandler:
         Returns:
             List of recent errors
         """
-        errors = self.error_history.copy()
+        errors = self.error_history
         
         # Filter by error type
         if error_type:
-            errors = [e for e in errors if e.error_type == error_type]
-        
-        # Sort by timestamp (most recent first)
-        errors.sort(key=lambda e: e.timestamp, reverse=True)
+            errors = (e for e in errors if e.error_type == error_type)
         
-        return errors[:limit]
+        # Most recent first
+        return heapq.nlargest(limit, errors, key=lambda e: e.timestamp)
     
     async def clear_history(self) -> None:
         """Clear error and retry history."""
@@ -326,6 +366,7 @@ class ErrorHandler:
             new_config: New retry configuration
         """
         self.retry_config = new_config
+        self._delay_table = self._build_delay_table()
         logger.info("Updated retry configuration")
     
     async def is_error_retryable(self, error: Exception) -> bool:
@@ -360,30 +401,34 @@ class MessageErrorHandler(ErrorHandler):
         Returns:
             True if error was handled successfully, False otherwise
         """
+        message_id = str(message.id)
+        sender_id = message.sender_id
+        topic = message.topic
         context = {
-            "message_id": str(message.id),
-            "topic": message.topic,
-            "sender_id": message.sender_id,
+            "message_id": message_id,
+            "topic": topic,
+            "sender_id": sender_id,
             "operation": operation
         }
         
+        error_type = self._classify_error(error)
         error_context = ErrorContext(
-            error_type=self._classify_error(error),
+            error_type=error_type,
             error_message=str(error),
             timestamp=datetime.utcnow(),
-            agent_id=message.sender_id,
-            topic=message.topic,
-            message_id=str(message.id),
+            agent_id=sender_id,
+            topic=topic,
+            message_id=message_id,
             metadata=context
         )
         
         self._record_error(error_context)
         
         # Check if message should be retried
-        if message.should_retry() and self.is_error_retryable(error):
-            logger.info(f"Message {message.id} will be retried")
+        if message.should_retry() and error_type in self.retry_config.retryable_errors:
+            logger.info(f"Message {message_id} will be retried")
             return True
         
         # Message cannot be retried
-        logger.error(f"Message {message.id} failed permanently: {str(error)}")
+        logger.error(f"Message {message_id} failed permanently: {error_context.error_message}")
         return False
@@ -1,9 +1,11 @@
 """Message broker for Redpanda integration."""
 
 import asyncio
-import json
+import functools
+import inspect
 import logging
-from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 
 from kafka import KafkaProducer, KafkaConsumer
 from kafka.errors import KafkaError
@@ -14,6 +16,86 @@ from .topic_manager import TopicManager
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _Subscription:
+    """A topic subscription and how its records are delivered."""
+    
+    agent_id: str
+    handler: Callable
+    batched: bool
+    key_filter: Optional[Callable[[Optional[bytes]], bool]] = None
+    is_coroutine: bool = False
+
+
+@dataclass
+class _ConsumerGroup:
+    """The single consumer and poll loop serving all of an agent's topics."""
+    
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    consumer: Optional[KafkaConsumer] = None
+    task: Optional[asyncio.Task] = None
+    max_records: Optional[int] = None
+
+
+# Put on a queue drained by drain_batches to flush what is queued and stop
+STOP_DRAINING = object()
+
+
+async def drain_batches(
+    queue: asyncio.Queue,
+    max_batch_size: int,
+    max_delay: float,
+    publish: Callable[[List[AgentMessage]], Awaitable[None]],
+    on_error: Callable[[Exception, List[AgentMessage]], Awaitable[None]]
+) -> None:
+    """Drain a queue of outgoing messages into batched publishes.
+    
+    A batch is published once it holds max_batch_size messages or
+    max_delay seconds after its first message arrived, whichever comes
+    first. Returns after publishing what was queued before STOP_DRAINING.
+    
+    Args:
+        queue: Queue of messages to publish
+        max_batch_size: Maximum number of messages per batch
+        max_delay: Maximum seconds to wait for a batch to fill
+        publish: Coroutine function publishing one batch
+        on_error: Coroutine function called with the error and batch when
+            publishing fails
+    """
+    loop = asyncio.get_running_loop()
+    stopping = False
+    
+    while not stopping:
+        message = await queue.get()
+        if message is STOP_DRAINING:
+            break
+        
+        # Collect until the batch is full or the delay has elapsed
+        batch = [message]
+        deadline = loop.time() + max_delay
+        while len(batch) < max_batch_size:
+            if queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                message = queue.get_nowait()
+            
+            if message is STOP_DRAINING:
+                stopping = True
+                break
+            batch.append(message)
+        
+        try:
+            await publish(batch)
+        except Exception as e:
+            await on_error(e, batch)
+
+
 class MessageBroker:
     """Message broker for handling Redpanda/Kafka communication."""
     
@@ -24,6 +106,10 @@ class MessageBroker:
         sasl_mechanism: Optional[str] = None,
         sasl_username: Optional[str] = None,
         sasl_password: Optional[str] = None,
+        linger_ms: int = 10,
+        batch_size: int = 65536,
+        acks: Any = 1,
+        compression_type: Optional[str] = None,
         **kwargs: Any
     ):
         """Initialize the message broker.
@@ -34,6 +120,13 @@ class MessageBroker:
             sasl_mechanism: SASL mechanism if using SASL
             sasl_username: SASL username if using SASL
             sasl_password: SASL password if using SASL
+            linger_ms: Time the producer waits to fill a batch before sending
+            batch_size: Maximum producer batch size in bytes
+            acks: Broker acknowledgements required per produce request
+                (0, 1 or "all")
+            compression_type: Producer batch compression ("gzip", "snappy",
+                "lz4" or "zstd"); codecs other than gzip need their Python
+                package installed
             **kwargs: Additional Kafka configuration
         """
         self.bootstrap_servers = bootstrap_servers or ["localhost:9092"]
@@ -41,6 +134,10 @@ class MessageBroker:
         self.sasl_mechanism = sasl_mechanism
         self.sasl_username = sasl_username
         self.sasl_password = sasl_password
+        self.linger_ms = linger_ms
+        self.batch_size = batch_size
+        self.acks = acks
+        self.compression_type = compression_type
         
         # Kafka configuration
         self.kafka_config = {
@@ -57,18 +154,32 @@ class MessageBroker:
             })
         
         self.producer: Optional[KafkaProducer] = None
-        self.consumers: Dict[str, KafkaConsumer] = {}
+        self.consumers: Dict[str, KafkaConsumer] = {}  # topic -> its agent's consumer
         self.topic_manager = TopicManager()
         self.message_handlers: Dict[str, Callable[[AgentMessage], None]] = {}
+        self.agent_topics: Dict[str, Set[str]] = {}  # agent_id -> set of topics
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._groups: Dict[str, _ConsumerGroup] = {}  # agent_id -> consumer group
+        # Bound on async per-message handlers running at once; the semaphore
+        # is created on first use so it binds to the running loop
+        self.max_concurrent_handlers = 32
+        self._handler_semaphore: Optional[asyncio.Semaphore] = None
         self.running = False
         
     async def start(self) -> None:
         """Start the message broker."""
         try:
-            # Initialize producer
-            self.producer = KafkaProducer(
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                **self.kafka_config
+            # Initialize producer; it bootstraps synchronously, so off the loop
+            self.producer = await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    KafkaProducer,
+                    linger_ms=self.linger_ms,
+                    batch_size=self.batch_size,
+                    acks=self.acks,
+                    compression_type=self.compression_type,
+                    **self.kafka_config
+                )
             )
             
             self.running = True
@@ -81,22 +192,31 @@ class MessageBroker:
     async def stop(self) -> None:
         """Stop the message broker."""
         self.running = False
+        loop = asyncio.get_running_loop()
         
         # Close all consumers
-        for consumer in self.consumers.values():
-            consumer.close()
+        groups = list(self._groups.values())
+        self._groups.clear()
+        self._subscriptions.clear()
         self.consumers.clear()
+        await asyncio.gather(*(self._close_group(group) for group in groups))
         
-        # Close producer
+        # Flush outstanding messages and close producer
         if self.producer:
-            self.producer.close()
-            self.producer = None
+            await self.drain()
+            producer, self.producer = self.producer, None
+            await loop.run_in_executor(None, producer.close)
         
         logger.info("Message broker stopped")
     
     async def publish_message(self, message: AgentMessage) -> None:
         """Publish a message to a topic.
         
+        The message is handed to the producer and this returns without
+        waiting for the broker acknowledgement; delivery results are
+        reported through producer callbacks. Use ``drain`` to wait for
+        outstanding messages.
+        
         Args:
             message: The message to publish
         """
@@ -104,23 +224,8 @@ class MessageBroker:
             raise RuntimeError("Message broker not started")
         
         try:
-            # Ensure topic exists
-            await self.topic_manager.ensure_topic_exists(
-                message.topic,
-                message.sender_id,
-                message.sender_name
-            )
-            
-            # Publish message
-            future = self.producer.send(
-                message.topic,
-                value=message.to_dict(),
-                key=message.sender_id.encode('utf-8')
-            )
-            
-            # Wait for confirmation
-            record_metadata = future.get(timeout=10)
-            logger.debug(f"Message published to topic {message.topic}, partition {record_metadata.partition}")
+            await self._ensure_topic(message)
+            self._send(message)
             
         except KafkaError as e:
             logger.error(f"Failed to publish message: {e}")
@@ -129,45 +234,219 @@ class MessageBroker:
             logger.error(f"Unexpected error publishing message: {e}")
             raise
     
+    async def publish_batch(self, messages: List[AgentMessage]) -> None:
+        """Publish a batch of messages.
+        
+        All records are handed to the producer in one pass, so the
+        producer can group them into as few produce requests as its
+        ``linger_ms``/``batch_size`` settings allow. Like
+        ``publish_message`` this does not wait for acknowledgements.
+        
+        Args:
+            messages: The messages to publish
+        """
+        if not self.producer:
+            raise RuntimeError("Message broker not started")
+        
+        if not messages:
+            return
+        
+        try:
+            # Ensure every target topic exists once per batch
+            checked: Set[str] = set()
+            for message in messages:
+                if message.topic not in checked:
+                    checked.add(message.topic)
+                    await self._ensure_topic(message)
+            
+            # A message fanned out several times in one batch is encoded once
+            encoded: Dict[int, bytes] = {}
+            for message in messages:
+                value = encoded.get(id(message))
+                if value is None:
+                    value = encoded[id(message)] = message.to_json_bytes()
+                self._send(message, value)
+            
+            logger.debug(f"Queued batch of {len(messages)} messages")
+            
+        except KafkaError as e:
+            logger.error(f"Failed to publish message batch: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error publishing message batch: {e}")
+            raise
+    
+    async def drain(self, timeout: Optional[float] = 10) -> None:
+        """Wait until all outstanding messages have been acknowledged.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+        """
+        if self.producer:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.producer.flush, timeout
+            )
+    
+    async def _ensure_topic(self, message: AgentMessage) -> None:
+        """Register the message's topic unless the topic manager already knows it."""
+        if message.topic not in self.topic_manager.topics:
+            await self.topic_manager.ensure_topic_exists(
+                message.topic,
+                message.sender_id,
+                message.sender_name
+            )
+    
+    def _send(self, message: AgentMessage, value: Optional[bytes] = None) -> None:
+        """Hand a message to the producer with delivery callbacks attached.
+        
+        Args:
+            message: The message to publish
+            value: The message already encoded with ``to_json_bytes``, if available
+        """
+        future = self.producer.send(
+            message.topic,
+            value=message.to_json_bytes() if value is None else value,
+            key=message.sender_id.encode('utf-8')
+        )
+        future.add_callback(self._on_delivery, message.topic)
+        future.add_errback(self._on_delivery_error, message.topic, str(message.id))
+    
+    @staticmethod
+    def _on_delivery(topic: str, record_metadata: Any) -> None:
+        """Log a successful delivery."""
+        logger.debug(f"Message published to topic {topic}, partition {record_metadata.partition}")
+    
+    @staticmethod
+    def _on_delivery_error(topic: str, message_id: str, error: Exception) -> None:
+        """Log a failed delivery."""
+        logger.error(f"Failed to deliver message {message_id} to topic {topic}: {error}")
+    
     async def subscribe_to_topic(
         self,
         topic: str,
         agent_id: str,
-        handler: Callable[[AgentMessage], None]
+        handler: Callable[[AgentMessage], None],
+        key_filter: Optional[Callable[[Optional[bytes]], bool]] = None
     ) -> None:
         """Subscribe to a topic.
         
+        A coroutine function handler is awaited for every message of a poll
+        concurrently, at most ``max_concurrent_handlers`` at a time, so
+        messages may finish out of order; a plain function is called for
+        each message in order.
+        
+        Args:
+            topic: Topic name to subscribe to
+            agent_id: ID of the subscribing agent
+            handler: Message handler function or coroutine function
+            key_filter: Optional predicate on the raw record key; records
+                it rejects are skipped before their value is decoded
+        """
+        subscription = _Subscription(
+            agent_id,
+            handler,
+            batched=False,
+            key_filter=key_filter,
+            is_coroutine=inspect.iscoroutinefunction(handler)
+        )
+        if await self._add_subscription(topic, subscription):
+            logger.info(f"Subscribed to topic {topic}")
+    
+    async def subscribe_to_topic_batch(
+        self,
+        topic: str,
+        agent_id: str,
+        handler: Callable[[List[AgentMessage]], Awaitable[None]],
+        batch_size: int = 20,
+        key_filter: Optional[Callable[[Optional[bytes]], bool]] = None
+    ) -> None:
+        """Subscribe to a topic and receive messages in batches.
+        
+        The handler is awaited once per poll with every message that poll
+        returned for the topic, instead of once per message.
+        
         Args:
             topic: Topic name to subscribe to
             agent_id: ID of the subscribing agent
-            handler: Message handler function
+            handler: Async handler called with a list of messages
+            batch_size: Maximum number of records fetched per poll; the
+                agent's topics share one poll, so the largest requested
+                size applies to all of them
+            key_filter: Optional predicate on the raw record key; records
+                it rejects are skipped before their value is decoded
         """
-        if topic in self.consumers:
+        subscription = _Subscription(agent_id, handler, batched=True, key_filter=key_filter)
+        if await self._add_subscription(topic, subscription, batch_size):
+            logger.info(f"Subscribed to topic {topic} in batch mode")
+    
+    async def _add_subscription(
+        self,
+        topic: str,
+        subscription: "_Subscription",
+        batch_size: Optional[int] = None
+    ) -> bool:
+        """Add a topic to its agent's consumer, creating the consumer if needed.
+        
+        Each agent gets a single consumer subscribed to all of its topics
+        and a single poll loop, rather than one consumer and loop per topic.
+        
+        Returns:
+            True if subscribed, False if the topic already had a subscription
+        """
+        if topic in self._subscriptions:
             logger.warning(f"Already subscribed to topic {topic}")
-            return
+            return False
+        
+        agent_id = subscription.agent_id
+        group = self._groups.get(agent_id)
+        if group is None:
+            group = self._groups[agent_id] = _ConsumerGroup()
+        if batch_size:
+            group.max_records = max(group.max_records or 0, batch_size)
+        
+        self._subscriptions[topic] = subscription
+        self.message_handlers[topic] = subscription.handler
+        topics = self.agent_topics.setdefault(agent_id, set())
+        topics.add(topic)
         
         try:
-            # Create consumer
-            consumer = KafkaConsumer(
-                topic,
+            async with group.lock:
+                if group.consumer is None:
+                    group.consumer = await self._create_consumer(agent_id)
+                await asyncio.get_running_loop().run_in_executor(
+                    None, functools.partial(group.consumer.subscribe, topics=sorted(topics))
+                )
+        except Exception as e:
+            self._subscriptions.pop(topic, None)
+            self.message_handlers.pop(topic, None)
+            topics.discard(topic)
+            logger.error(f"Failed to subscribe to topic {topic}: {e}")
+            raise
+        
+        self.consumers[topic] = group.consumer
+        
+        # Start consuming in background
+        if group.task is None:
+            group.task = asyncio.create_task(self._consume(agent_id, group))
+        return True
+    
+    async def _create_consumer(self, agent_id: str) -> KafkaConsumer:
+        """Create the consumer for an agent's subscriptions.
+        
+        The consumer connects while it is constructed, so this runs in a
+        worker thread. Values are left as raw bytes so records can be
+        filtered by key before paying for deserialization; see ``_decode``.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(
+                KafkaConsumer,
                 group_id=f"agent-{agent_id}",
-                value_deserializer=lambda m: json.loads(m.decode('utf-8')),
                 auto_offset_reset='latest',
                 enable_auto_commit=True,
                 **self.kafka_config
             )
-            
-            self.consumers[topic] = consumer
-            self.message_handlers[topic] = handler
-            
-            # Start consuming in background
-            asyncio.create_task(self._consume_messages(topic, consumer, handler))
-            
-            logger.info(f"Subscribed to topic {topic}")
-            
-        except Exception as e:
-            logger.error(f"Failed to subscribe to topic {topic}: {e}")
-            raise
+        )
     
     async def unsubscribe_from_topic(self, topic: str) -> None:
         """Unsubscribe from a topic.
@@ -175,44 +454,147 @@ class MessageBroker:
         Args:
             topic: Topic name to unsubscribe from
         """
-        if topic in self.consumers:
-            self.consumers[topic].close()
-            del self.consumers[topic]
-            del self.message_handlers[topic]
-            logger.info(f"Unsubscribed from topic {topic}")
+        subscription = self._subscriptions.pop(topic, None)
+        if subscription is None:
+            return
+        
+        self.consumers.pop(topic, None)
+        self.message_handlers.pop(topic, None)
+        agent_id = subscription.agent_id
+        topics = self.agent_topics.get(agent_id, set())
+        topics.discard(topic)
+        
+        group = self._groups.get(agent_id)
+        if group is not None:
+            if topics:
+                async with group.lock:
+                    if group.consumer is not None:
+                        await asyncio.get_running_loop().run_in_executor(
+                            None, functools.partial(group.consumer.subscribe, topics=sorted(topics))
+                        )
+            else:
+                del self._groups[agent_id]
+                await self._close_group(group)
+        
+        logger.info(f"Unsubscribed from topic {topic}")
     
-    async def _consume_messages(
-        self,
-        topic: str,
-        consumer: KafkaConsumer,
-        handler: Callable[[AgentMessage], None]
-    ) -> None:
-        """Consume messages from a topic.
+    async def unsubscribe_all(self, agent_id: str) -> None:
+        """Unsubscribe an agent from every topic it subscribed to.
         
         Args:
-            topic: Topic name
-            consumer: Kafka consumer
-            handler: Message handler function
+            agent_id: ID of the agent
+        """
+        topics = self.agent_topics.pop(agent_id, set())
+        for topic in topics:
+            self._subscriptions.pop(topic, None)
+            self.consumers.pop(topic, None)
+            self.message_handlers.pop(topic, None)
+        
+        group = self._groups.pop(agent_id, None)
+        if group is not None:
+            try:
+                await self._close_group(group)
+            except Exception as e:
+                logger.error(f"Failed to close consumer for agent {agent_id}: {e}")
+        
+        if topics:
+            logger.info(f"Unsubscribed agent {agent_id} from {len(topics)} topics")
+    
+    @staticmethod
+    async def _close_group(group: "_ConsumerGroup") -> None:
+        """Close a group's consumer once its poll loop is not using it."""
+        async with group.lock:
+            if group.consumer is not None:
+                await asyncio.get_running_loop().run_in_executor(None, group.consumer.close)
+    
+    async def _consume(self, agent_id: str, group: "_ConsumerGroup") -> None:
+        """Poll an agent's consumer and dispatch records to each topic's handler.
+        
+        Args:
+            agent_id: ID of the agent
+            group: The agent's consumer group
         """
+        loop = asyncio.get_running_loop()
         try:
             while self.running:
-                message_batch = consumer.poll(timeout_ms=1000)
+                # The lock keeps (re)subscribe and close off the consumer while
+                # it polls; the poll itself runs in a worker thread
+                async with group.lock:
+                    if self._groups.get(agent_id) is not group:
+                        break
+                    message_batch = await loop.run_in_executor(
+                        None,
+                        functools.partial(
+                            group.consumer.poll, timeout_ms=1000, max_records=group.max_records
+                        )
+                    )
                 
                 for topic_partition, messages in message_batch.items():
-                    for message in messages:
-                        try:
-                            # Parse message
-                            message_data = message.value
-                            agent_message = AgentMessage.from_dict(message_data)
-                            
-                            # Call handler
-                            handler(agent_message)
-                            
-                        except Exception as e:
-                            logger.error(f"Error processing message from {topic}: {e}")
-                            
+                    await self._dispatch(topic_partition.topic, messages)
+        
         except Exception as e:
-            logger.error(f"Error consuming messages from {topic}: {e}")
+            logger.error(f"Error consuming messages for agent {agent_id}: {e}")
+    
+    async def _dispatch(self, topic: str, records: List[Any]) -> None:
+        """Decode one topic's records from a poll and hand them to its handler.
+        
+        Args:
+            topic: Topic name
+            records: Consumer records polled for the topic
+        """
+        subscription = self._subscriptions.get(topic)
+        if subscription is None:
+            return
+        
+        key_filter = subscription.key_filter
+        batch: List[AgentMessage] = []
+        for record in records:
+            if key_filter and not key_filter(record.key):
+                continue
+            try:
+                batch.append(self._decode(record.value))
+            except Exception as e:
+                logger.error(f"Error processing message from {topic}: {e}")
+        
+        if not batch:
+            return
+        
+        if subscription.batched:
+            try:
+                await subscription.handler(batch)
+            except Exception as e:
+                logger.error(f"Error handling message batch from {topic}: {e}")
+        elif subscription.is_coroutine:
+            results = await asyncio.gather(
+                *(self._run_bounded(subscription.handler, agent_message) for agent_message in batch),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Error processing message from {topic}: {result}")
+        else:
+            handler = subscription.handler
+            for agent_message in batch:
+                try:
+                    handler(agent_message)
+                except Exception as e:
+                    logger.error(f"Error processing message from {topic}: {e}")
+    
+    async def _run_bounded(
+        self,
+        handler: Callable[[AgentMessage], Awaitable[None]],
+        message: AgentMessage
+    ) -> None:
+        """Await an async message handler under the handler concurrency limit."""
+        if self._handler_semaphore is None:
+            self._handler_semaphore = asyncio.Semaphore(self.max_concurrent_handlers)
+        async with self._handler_semaphore:
+            await handler(message)
+    
+    @staticmethod
+    def _decode(value: bytes) -> AgentMessage:
+        """Deserialize a raw record value into a message."""
+        return AgentMessage.from_json_bytes(value)
     
     async def list_topics(self) -> List[str]:
         """List all available topics.
@@ -221,11 +603,7 @@ class MessageBroker:
             List of topic names
         """
         try:
-            from kafka.admin import KafkaAdminClient, ConfigResource, ConfigResourceType
-            
-            admin_client = KafkaAdminClient(**self.kafka_config)
-            metadata = admin_client.list_topics()
-            return list(metadata)
+            return await asyncio.get_running_loop().run_in_executor(None, self._list_topics_sync)
             
         except Exception as e:
             logger.error(f"Failed to list topics: {e}")
@@ -244,19 +622,12 @@ class MessageBroker:
             num_partitions: Number of partitions
             replication_factor: Replication factor
         """
+        from kafka.errors import TopicAlreadyExistsError
+        
         try:
-            from kafka.admin import KafkaAdminClient, NewTopic
-            from kafka.errors import TopicAlreadyExistsError
-            
-            admin_client = KafkaAdminClient(**self.kafka_config)
-            
-            topic_list = [NewTopic(
-                name=topic,
-                num_partitions=num_partitions,
-                replication_factor=replication_factor
-            )]
-            
-            admin_client.create_topics(new_topics=topic_list, validate_only=False)
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._create_topic_sync, topic, num_partitions, replication_factor
+            )
             logger.info(f"Created topic {topic}")
             
         except TopicAlreadyExistsError:
@@ -265,6 +636,33 @@ class MessageBroker:
             logger.error(f"Failed to create topic {topic}: {e}")
             raise
     
+    def _list_topics_sync(self) -> List[str]:
+        """List topics with a short-lived admin client (blocking)."""
+        from kafka.admin import KafkaAdminClient
+        
+        admin_client = KafkaAdminClient(**self.kafka_config)
+        try:
+            return list(admin_client.list_topics())
+        finally:
+            admin_client.close()
+    
+    def _create_topic_sync(self, topic: str, num_partitions: int, replication_factor: int) -> None:
+        """Create a topic with a short-lived admin client (blocking)."""
+        from kafka.admin import KafkaAdminClient, NewTopic
+        
+        admin_client = KafkaAdminClient(**self.kafka_config)
+        try:
+            admin_client.create_topics(
+                new_topics=[NewTopic(
+                    name=topic,
+                    num_partitions=num_partitions,
+                    replication_factor=replication_factor
+                )],
+                validate_only=False
+            )
+        finally:
+            admin_client.close()
+    
     async def health_check(self) -> bool:
         """Check if the message broker is healthy.
         
@@ -3,10 +3,19 @@
 import asyncio
 import logging
 import re
-from typing import Any, Callable, Dict, List, Optional, Set, Union
-from dataclasses import dataclass
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Any, Callable, ClassVar, Deque, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from uuid import UUID
+from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator for CONTENT_KEYWORD rules
+    ahocorasick = None
+
 from ..schemas.message import AgentMessage, MessageType, MessagePriority
 
 logger = logging.getLogger(__name__)
@@ -34,15 +43,117 @@ class RoutingRule:
     priority: int = 0  # Higher priority rules are evaluated first
     active: bool = True
     description: Optional[str] = None
+    _predicate: Callable[[AgentMessage], bool] = field(
+        init=False, repr=False, compare=False
+    )
+    # Bumped when any rule is recompiled, so routers rebuild their keyword index
+    _generation: ClassVar[int] = 0
+    
+    def __post_init__(self) -> None:
+        self._predicate = _compile_predicate(self)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Recompile on direct edits; during __init__ __post_init__ compiles instead
+        if name in ("rule_type", "condition") and "_predicate" in self.__dict__:
+            super().__setattr__("_predicate", _compile_predicate(self))
+            RoutingRule._generation += 1
 
 
-@dataclass
-class MessageRoute:
-    """Represents a message route."""
+# Rank of each priority, for PRIORITY rules
+_PRIORITY_ORDER = {
+    MessagePriority.LOW: 0,
+    MessagePriority.NORMAL: 1,
+    MessagePriority.HIGH: 2,
+    MessagePriority.URGENT: 3
+}
+
+
+def _never(message: AgentMessage) -> bool:
+    return False
+
+
+def _rule_keywords(rule: RoutingRule) -> Tuple[str, ...]:
+    """Lowercased keywords of a CONTENT_KEYWORD rule."""
+    condition = rule.condition
+    return tuple(
+        keyword.lower()
+        for keyword in (condition if isinstance(condition, list) else [condition])
+    )
+
+
+def _compile_predicate(rule: RoutingRule) -> Callable[[AgentMessage], bool]:
+    """Specialize a rule's condition into a predicate on messages.
     
-    message: AgentMessage
-    target_topics: List[str]
-    routing_rules: List[RoutingRule]
+    Keywords are lowercased, patterns compiled and thresholds resolved once
+    here, so evaluating a rule is a single call per message.
+    
+    Args:
+        rule: Rule to compile
+    
+    Returns:
+        Predicate returning True if a message matches the rule
+    """
+    rule_type = rule.rule_type
+    condition = rule.condition
+    try:
+        if rule_type == RoutingRuleType.CONTENT_KEYWORD:
+            keywords = _rule_keywords(rule)
+            
+            def match_keywords(message: AgentMessage) -> bool:
+                content = message.content.lower()
+                return any(keyword in content for keyword in keywords)
+            return match_keywords
+        
+        elif rule_type == RoutingRuleType.CONTENT_REGEX:
+            search = re.compile(condition, re.IGNORECASE).search
+            return lambda message: search(message.content) is not None
+        
+        elif rule_type == RoutingRuleType.SENDER_ROLE:
+            allowed_roles = tuple(condition) if isinstance(condition, list) else (condition,)
+            return lambda message: message.sender_role in allowed_roles
+        
+        elif rule_type == RoutingRuleType.MESSAGE_TYPE:
+            allowed_types = tuple(condition) if isinstance(condition, list) else (condition,)
+            return lambda message: message.message_type in allowed_types
+        
+        elif rule_type == RoutingRuleType.PRIORITY:
+            min_rank = _PRIORITY_ORDER.get(condition, 0)
+            rank = _PRIORITY_ORDER.get
+            return lambda message: rank(message.priority, 0) >= min_rank
+        
+        elif rule_type == RoutingRuleType.METADATA:
+            if not isinstance(condition, dict):
+                return _never
+            required = tuple(condition.items())
+            
+            def match_metadata(message: AgentMessage) -> bool:
+                metadata = message.metadata
+                for key, value in required:
+                    if key not in metadata or metadata[key] != value:
+                        return False
+                return True
+            return match_metadata
+        
+        elif rule_type == RoutingRuleType.CUSTOM:
+            return condition if callable(condition) else _never
+    
+    except Exception as e:
+        logger.error(f"Error compiling rule {rule.rule_id}: {e}")
+    
+    return _never
+
+
+class MessageRoute(NamedTuple):
+    """Represents a message route.
+    
+    Routes keep only identifiers, so the history does not hold on to
+    messages or rules.
+    """
+    
+    message_id: UUID
+    target_topics: Tuple[str, ...]
+    rule_ids: Tuple[str, ...]
     timestamp: str
 
 
@@ -52,9 +163,32 @@ class MessageRouter:
     def __init__(self):
         """Initialize the message router."""
         self.routing_rules: List[RoutingRule] = []
-        self.route_history: List[MessageRoute] = []
-        self.max_history_size = 1000
+        # -priority of each rule in routing_rules, for bisecting (ascending)
+        self._rule_keys: List[int] = []
+        # rule_id -> the rule get_rule_by_id returns (the first registered)
+        self._rules_by_id: Dict[str, RoutingRule] = {}
+        # Keyword -> CONTENT_KEYWORD rules, plus an automaton over the keywords;
+        # rebuilt lazily after rules change
+        self._keyword_index: Optional[Tuple[Dict[str, List[RoutingRule]], Any]] = None
+        self._keyword_generation = RoutingRule._generation  # rule generation of the index
+        self.route_history: Deque[MessageRoute] = deque(maxlen=1000)
+        self._history_target_count = 0  # sum of len(target_topics) over route_history
+        # Skip non-CUSTOM rules whose target topics are all already routed to;
+        # such rules are then not evaluated, nor recorded as matched in the
+        # route history
+        self.skip_redundant_rules = True
         
+    @property
+    def max_history_size(self) -> int:
+        """Maximum number of routes kept in route_history."""
+        return self.route_history.maxlen
+    
+    @max_history_size.setter
+    def max_history_size(self, size: int) -> None:
+        # A deque's maxlen is fixed, so resizing keeps the newest routes in a new one
+        self.route_history = deque(self.route_history, maxlen=size)
+        self._history_target_count = sum(len(route.target_topics) for route in self.route_history)
+    
     async def add_routing_rule(
         self,
         rule_id: str,
@@ -86,9 +220,9 @@ class MessageRouter:
             description=description
         )
         
-        self.routing_rules.append(rule)
-        # Sort by priority (highest first)
-        self.routing_rules.sort(key=lambda r: r.priority, reverse=True)
+        self._insert_rule(rule)
+        self._rules_by_id.setdefault(rule_id, rule)
+        self._keyword_index = None
         
         logger.info(f"Added routing rule {rule_id} with priority {priority}")
         return rule
@@ -102,16 +236,48 @@ class MessageRouter:
         Returns:
             True if removed, False if not found
         """
-        for i, rule in enumerate(self.routing_rules):
-            if rule.rule_id == rule_id:
+        rule = self._rules_by_id.pop(rule_id, None)
+        if rule is None:
+            return False
+        
+        self._detach_rule(rule, rule.priority)
+        self._reindex(rule_id)
+        self._keyword_index = None
+        logger.info(f"Removed routing rule {rule_id}")
+        return True
+    
+    def _insert_rule(self, rule: RoutingRule) -> None:
+        """Insert a rule after every rule of higher or equal priority."""
+        key = -rule.priority
+        i = bisect_right(self._rule_keys, key)
+        self._rule_keys.insert(i, key)
+        self.routing_rules.insert(i, rule)
+    
+    def _detach_rule(self, rule: RoutingRule, priority: int) -> None:
+        """Remove a rule stored under the given priority from the sorted list."""
+        key = -priority
+        for i in range(bisect_left(self._rule_keys, key), bisect_right(self._rule_keys, key)):
+            if self.routing_rules[i] is rule:
                 del self.routing_rules[i]
-                logger.info(f"Removed routing rule {rule_id}")
-                return True
-        return False
+                del self._rule_keys[i]
+                return
+    
+    def _reindex(self, rule_id: str) -> None:
+        """Point the index at the next rule registered under rule_id, if any."""
+        for rule in self.routing_rules:
+            if rule.rule_id == rule_id:
+                self._rules_by_id.setdefault(rule_id, rule)
+                return
     
     async def route_message(self, message: AgentMessage) -> List[str]:
         """Route a message based on active rules.
         
+        With skip_redundant_rules set, a rule whose target topics are all
+        already routed to is not evaluated, so it is missing from the
+        route's rule_ids even if it would have matched. Rules without
+        target topics and CUSTOM rules, whose conditions may have side
+        effects, are always evaluated.
+        
         Args:
             message: Message to route
             
@@ -119,35 +285,100 @@ class MessageRouter:
             List of target topics
         """
         target_topics = set()
-        matched_rules = []
+        matched_rule_ids = []
+        keyword_matches = self._match_keywords(message)
+        skip_redundant = self.skip_redundant_rules
         
         # Evaluate rules in priority order
         for rule in self.routing_rules:
             if not rule.active:
                 continue
             
-            if await self._evaluate_rule(message, rule):
+            if (
+                skip_redundant
+                and rule.target_topics
+                and rule.rule_type != RoutingRuleType.CUSTOM
+                and target_topics.issuperset(rule.target_topics)
+            ):
+                continue
+            
+            if rule.rule_type == RoutingRuleType.CONTENT_KEYWORD:
+                matched = id(rule) in keyword_matches
+            else:
+                matched = self._evaluate_rule(message, rule)
+            
+            if matched:
                 target_topics.update(rule.target_topics)
-                matched_rules.append(rule)
+                matched_rule_ids.append(rule.rule_id)
                 logger.debug(f"Message matched rule {rule.rule_id}")
         
         # Record the route
         route = MessageRoute(
-            message=message,
-            target_topics=list(target_topics),
-            routing_rules=matched_rules,
+            message_id=message.id,
+            target_topics=tuple(target_topics),
+            rule_ids=tuple(matched_rule_ids),
             timestamp=message.timestamp.isoformat()
         )
         
-        self.route_history.append(route)
+        # The bounded deque drops the oldest route once full
+        history = self.route_history
+        if len(history) == history.maxlen:
+            self._history_target_count -= len(history[0].target_topics)
+        history.append(route)
+        self._history_target_count += len(route.target_topics)
+        
+        return list(route.target_topics)
+    
+    def _match_keywords(self, message: AgentMessage) -> Set[int]:
+        """Find the CONTENT_KEYWORD rules whose keywords occur in a message.
         
-        # Trim history if too large
-        if len(self.route_history) > self.max_history_size:
-            self.route_history = self.route_history[-self.max_history_size:]
+        The content is lowercased once and, with pyahocorasick installed,
+        scanned once for the keywords of every rule.
+        
+        Args:
+            message: Message to match
+        
+        Returns:
+            ids of the matching rules
+        """
+        if self._keyword_index is None or self._keyword_generation != RoutingRule._generation:
+            self._keyword_index = self._build_keyword_index()
+            self._keyword_generation = RoutingRule._generation
+        rules_by_keyword, automaton = self._keyword_index
+        if not rules_by_keyword:
+            return set()
         
-        return list(target_topics)
+        content = message.content.lower()
+        if automaton is not None:
+            found = {keyword for _, keyword in automaton.iter(content)}
+        else:
+            found = [keyword for keyword in rules_by_keyword if keyword in content]
+        return {id(rule) for keyword in found for rule in rules_by_keyword[keyword]}
     
-    async def _evaluate_rule(self, message: AgentMessage, rule: RoutingRule) -> bool:
+    def _build_keyword_index(self) -> Tuple[Dict[str, List[RoutingRule]], Any]:
+        """Index every CONTENT_KEYWORD rule by its lowercased keywords."""
+        rules_by_keyword: Dict[str, List[RoutingRule]] = defaultdict(list)
+        for rule in self.routing_rules:
+            if rule.rule_type != RoutingRuleType.CONTENT_KEYWORD:
+                continue
+            try:
+                keywords = _rule_keywords(rule)
+            except Exception:
+                continue  # logged when the rule was compiled; never matches
+            for keyword in keywords:
+                rules_by_keyword[keyword].append(rule)
+        
+        # The automaton cannot hold the empty keyword, which matches everything
+        automaton = None
+        if ahocorasick is not None and rules_by_keyword and "" not in rules_by_keyword:
+            automaton = ahocorasick.Automaton()
+            for keyword in rules_by_keyword:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+        
+        return rules_by_keyword, automaton
+    
+    def _evaluate_rule(self, message: AgentMessage, rule: RoutingRule) -> bool:
         """Evaluate a routing rule against a message.
         
         Args:
@@ -158,46 +389,7 @@ class MessageRouter:
             True if rule matches, False otherwise
         """
         try:
-            if rule.rule_type == RoutingRuleType.CONTENT_KEYWORD:
-                keywords = rule.condition if isinstance(rule.condition, list) else [rule.condition]
-                return any(keyword.lower() in message.content.lower() for keyword in keywords)
-            
-            elif rule.rule_type == RoutingRuleType.CONTENT_REGEX:
-                return bool(re.search(rule.condition, message.content, re.IGNORECASE))
-            
-            elif rule.rule_type == RoutingRuleType.SENDER_ROLE:
-                allowed_roles = rule.condition if isinstance(rule.condition, list) else [rule.condition]
-                return message.sender_role in allowed_roles
-            
-            elif rule.rule_type == RoutingRuleType.MESSAGE_TYPE:
-                allowed_types = rule.condition if isinstance(rule.condition, list) else [rule.condition]
-                return message.message_type in allowed_types
-            
-            elif rule.rule_type == RoutingRuleType.PRIORITY:
-                min_priority = rule.condition
-                priority_order = {
-                    MessagePriority.LOW: 0,
-                    MessagePriority.NORMAL: 1,
-                    MessagePriority.HIGH: 2,
-                    MessagePriority.URGENT: 3
-                }
-                return priority_order.get(message.priority, 0) >= priority_order.get(min_priority, 0)
-            
-            elif rule.rule_type == RoutingRuleType.METADATA:
-                if not isinstance(rule.condition, dict):
-                    return False
-                for key, value in rule.condition.items():
-                    if key not in message.metadata or message.metadata[key] != value:
-                        return False
-                return True
-            
-            elif rule.rule_type == RoutingRuleType.CUSTOM:
-                if callable(rule.condition):
-                    return rule.condition(message)
-                return False
-            
-            return False
-            
+            return bool(rule._predicate(message))
         except Exception as e:
             logger.error(f"Error evaluating rule {rule.rule_id}: {e}")
             return False
@@ -219,10 +411,7 @@ class MessageRouter:
         Returns:
             RoutingRule or None if not found
         """
-        for rule in self.routing_rules:
-            if rule.rule_id == rule_id:
-                return rule
-        return None
+        return self._rules_by_id.get(rule_id)
     
     async def update_rule(
         self,
@@ -238,19 +427,27 @@ class MessageRouter:
         Returns:
             True if updated, False if not found
         """
-        for rule in self.routing_rules:
-            if rule.rule_id == rule_id:
-                for key, value in updates.items():
-                    if hasattr(rule, key):
-                        setattr(rule, key, value)
-                
-                # Re-sort by priority if priority was updated
-                if 'priority' in updates:
-                    self.routing_rules.sort(key=lambda r: r.priority, reverse=True)
-                
-                logger.info(f"Updated routing rule {rule_id}")
-                return True
-        return False
+        rule = self._rules_by_id.get(rule_id)
+        if rule is None:
+            return False
+        
+        old_priority = rule.priority
+        for key, value in updates.items():
+            if hasattr(rule, key):
+                setattr(rule, key, value)
+        
+        if rule.rule_id != rule_id:
+            del self._rules_by_id[rule_id]
+            self._reindex(rule_id)
+            self._rules_by_id.setdefault(rule.rule_id, rule)
+        
+        # Move the rule to its new place if its priority changed
+        if rule.priority != old_priority:
+            self._detach_rule(rule, old_priority)
+            self._insert_rule(rule)
+        
+        logger.info(f"Updated routing rule {rule_id}")
+        return True
     
     async def enable_rule(self, rule_id: str) -> bool:
         """Enable a routing rule.
@@ -288,15 +485,15 @@ class MessageRouter:
         Returns:
             List of message routes
         """
-        history = self.route_history.copy()
+        history = self.route_history
         
         if topic_filter:
             history = [route for route in history if topic_filter in route.target_topics]
         
         if limit:
-            history = history[-limit:]
+            return list(islice(history, max(len(history) - limit, 0), None))
         
-        return history
+        return list(history)
     
     async def get_routing_stats(self) -> Dict[str, Any]:
         """Get routing statistics.
@@ -305,28 +502,30 @@ class MessageRouter:
             Dictionary with routing statistics
         """
         total_rules = len(self.routing_rules)
-        active_rules = len([r for r in self.routing_rules if r.active])
-        
+        active_rules = 0
         rule_types = {}
         for rule in self.routing_rules:
+            if rule.active:
+                active_rules += 1
             rule_type = rule.rule_type.value
             rule_types[rule_type] = rule_types.get(rule_type, 0) + 1
         
+        total_routes = len(self.route_history)
         return {
             "total_rules": total_rules,
             "active_rules": active_rules,
             "inactive_rules": total_rules - active_rules,
             "rule_types": rule_types,
-            "total_routes": len(self.route_history),
+            "total_routes": total_routes,
             "average_targets_per_route": (
-                sum(len(route.target_topics) for route in self.route_history) / len(self.route_history)
-                if self.route_history else 0
+                self._history_target_count / total_routes if total_routes else 0
             )
         }
     
     async def clear_history(self) -> None:
         """Clear routing history."""
         self.route_history.clear()
+        self._history_target_count = 0
         logger.info("Cleared routing history")
     
     async def export_rules(self) -> List[Dict[str, Any]]:
@@ -371,12 +570,16 @@ class MessageRouter:
                     description=rule_dict.get("description")
                 )
                 self.routing_rules.append(rule)
+                self._rules_by_id.setdefault(rule.rule_id, rule)
                 imported += 1
             except Exception as e:
                 logger.error(f"Error importing rule {rule_dict.get('rule_id', 'unknown')}: {e}")
         
-        # Re-sort by priority
+        self._keyword_index = None
+        
+        # Re-sort by priority once for the whole import
         self.routing_rules.sort(key=lambda r: r.priority, reverse=True)
+        self._rule_keys = [-rule.priority for rule in self.routing_rules]
         
         logger.info(f"Imported {imported} routing rules")
         return imported
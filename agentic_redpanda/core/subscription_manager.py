@@ -2,14 +2,45 @@
 
 import asyncio
 import logging
-from typing import Any, Callable, Dict, List, Optional, Set, Union
-from dataclasses import dataclass
+import operator
+import re
+import sys
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator for long content_keywords lists
+    ahocorasick = None
+
 from ..schemas.message import AgentMessage, MessageType, MessagePriority
 
 logger = logging.getLogger(__name__)
 
+# Rank of each priority, for min_priority filters
+_PRIORITY_ORDER = {
+    MessagePriority.LOW: 0,
+    MessagePriority.NORMAL: 1,
+    MessagePriority.HIGH: 2,
+    MessagePriority.URGENT: 3
+}
+
+# Below this many keywords, substring checks beat an Aho-Corasick scan
+_KEYWORD_AUTOMATON_MIN = 32
+
+
+def _compile_keywords(keywords: Tuple[str, ...]) -> Callable[[str], bool]:
+    """Build a matcher telling whether lowercased content contains any keyword."""
+    lowered = tuple(keyword.lower() for keyword in keywords)
+    if ahocorasick is not None and len(lowered) >= _KEYWORD_AUTOMATON_MIN and "" not in lowered:
+        automaton = ahocorasick.Automaton()
+        for keyword in lowered:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return lambda content_lower: next(automaton.iter(content_lower), None) is not None
+    return lambda content_lower: any(keyword in content_lower for keyword in lowered)
+
 
 class SubscriptionType(str, Enum):
     """Types of topic subscriptions."""
@@ -47,6 +78,39 @@ class SubscriptionFilter:
     
     # Custom filter function
     custom_filter: Optional[Callable[[AgentMessage], bool]] = None
+    
+    # (content_regex, compiled pattern), refreshed if content_regex is replaced
+    _regex_cache: Optional[Tuple[str, re.Pattern]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    # (snapshot of content_keywords, matcher), rebuilt if any keyword changes
+    _keyword_cache: Optional[Tuple[Tuple[str, ...], Callable[[str], bool]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    def _keyword_matcher(self) -> Callable[[str], bool]:
+        """Return a matcher for content_keywords, building it once."""
+        keywords = self.content_keywords
+        cached = self._keyword_cache
+        # Element identity checks catch in-place edits without allocating
+        if (
+            cached is None
+            or len(cached[0]) != len(keywords)
+            or not all(map(operator.is_, cached[0], keywords))
+        ):
+            snapshot = tuple(keywords)
+            cached = self._keyword_cache = (snapshot, _compile_keywords(snapshot))
+        return cached[1]
+    
+    def _compiled_regex(self) -> re.Pattern:
+        """Return content_regex compiled case-insensitively, compiling it once."""
+        cached = self._regex_cache
+        if cached is None or cached[0] is not self.content_regex:
+            cached = self._regex_cache = (
+                self.content_regex, re.compile(self.content_regex, re.IGNORECASE)
+            )
+        return cached[1]
 
 
 @dataclass
@@ -69,8 +133,8 @@ class SubscriptionManager:
     
     def __init__(self):
         """Initialize the subscription manager."""
-        self.subscriptions: Dict[str, List[TopicSubscription]] = {}  # topic -> list of subscriptions
-        self.agent_subscriptions: Dict[str, List[TopicSubscription]] = {}  # agent_id -> list of subscriptions
+        self.subscriptions: Dict[str, Dict[str, TopicSubscription]] = {}  # topic -> agent_id -> subscription
+        self.agent_subscriptions: Dict[str, Dict[str, TopicSubscription]] = {}  # agent_id -> topic -> subscription
         self.message_handlers: Dict[str, Callable[[AgentMessage], None]] = {}
         
     async def subscribe_agent_to_topic(
@@ -83,6 +147,8 @@ class SubscriptionManager:
     ) -> TopicSubscription:
         """Subscribe an agent to a topic with advanced filtering.
         
+        An existing subscription of the agent to the topic is replaced.
+        
         Args:
             agent_id: ID of the subscribing agent
             topic: Topic name
@@ -93,6 +159,9 @@ class SubscriptionManager:
         Returns:
             TopicSubscription object
         """
+        # Keys shared by both maps and every subscription
+        topic = sys.intern(topic)
+        agent_id = sys.intern(agent_id)
         subscription = TopicSubscription(
             topic=topic,
             agent_id=agent_id,
@@ -101,15 +170,8 @@ class SubscriptionManager:
             handler=handler
         )
         
-        # Add to topic subscriptions
-        if topic not in self.subscriptions:
-            self.subscriptions[topic] = []
-        self.subscriptions[topic].append(subscription)
-        
-        # Add to agent subscriptions
-        if agent_id not in self.agent_subscriptions:
-            self.agent_subscriptions[agent_id] = []
-        self.agent_subscriptions[agent_id].append(subscription)
+        self.subscriptions.setdefault(topic, {})[agent_id] = subscription
+        self.agent_subscriptions.setdefault(agent_id, {})[topic] = subscription
         
         # Store handler
         if handler:
@@ -131,22 +193,18 @@ class SubscriptionManager:
         removed = False
         
         # Remove from topic subscriptions
-        if topic in self.subscriptions:
-            self.subscriptions[topic] = [
-                sub for sub in self.subscriptions[topic] 
-                if not (sub.agent_id == agent_id and sub.topic == topic)
-            ]
-            if not self.subscriptions[topic]:
+        topic_subscriptions = self.subscriptions.get(topic)
+        if topic_subscriptions is not None:
+            topic_subscriptions.pop(agent_id, None)
+            if not topic_subscriptions:
                 del self.subscriptions[topic]
             removed = True
         
         # Remove from agent subscriptions
-        if agent_id in self.agent_subscriptions:
-            self.agent_subscriptions[agent_id] = [
-                sub for sub in self.agent_subscriptions[agent_id] 
-                if sub.topic != topic
-            ]
-            if not self.agent_subscriptions[agent_id]:
+        agent_subscriptions = self.agent_subscriptions.get(agent_id)
+        if agent_subscriptions is not None:
+            agent_subscriptions.pop(topic, None)
+            if not agent_subscriptions:
                 del self.agent_subscriptions[agent_id]
         
         # Remove handler
@@ -168,37 +226,50 @@ class SubscriptionManager:
         Returns:
             List of subscriptions that should receive the message
         """
-        if message.topic not in self.subscriptions:
+        subscriptions = self.subscriptions.get(message.topic)
+        if not subscriptions:
             return []
         
         matching_subscriptions = []
+        sender_id = message.sender_id
+        matches = self._message_matches_filter
+        content_lower = None  # lowercased once, for the first keyword filter
         
-        for subscription in self.subscriptions[message.topic]:
+        for subscription in subscriptions.values():
             if not subscription.active:
                 continue
             
             # Skip if message is from the same agent
-            if subscription.agent_id == message.sender_id:
+            if subscription.agent_id == sender_id:
                 continue
             
             # Apply filters
-            if await self._message_matches_filter(message, subscription.filter_criteria):
+            filter_criteria = subscription.filter_criteria
+            if content_lower is None and filter_criteria and filter_criteria.content_keywords:
+                content_lower = message.content.lower()
+            if matches(message, filter_criteria, content_lower):
                 matching_subscriptions.append(subscription)
+        
+        if matching_subscriptions:
+            received_at = message.timestamp.isoformat()
+            for subscription in matching_subscriptions:
                 subscription.message_count += 1
-                subscription.last_message_at = message.timestamp.isoformat()
+                subscription.last_message_at = received_at
         
         return matching_subscriptions
     
-    async def _message_matches_filter(
+    def _message_matches_filter(
         self, 
         message: AgentMessage, 
-        filter_criteria: Optional[SubscriptionFilter]
+        filter_criteria: Optional[SubscriptionFilter],
+        content_lower: Optional[str] = None
     ) -> bool:
         """Check if a message matches the filter criteria.
         
         Args:
             message: Message to check
             filter_criteria: Filter criteria
+            content_lower: The message content already lowercased, if available
             
         Returns:
             True if message matches, False otherwise
@@ -206,40 +277,13 @@ class SubscriptionManager:
         if not filter_criteria:
             return True
         
-        # Message type filtering
-        if filter_criteria.message_types and message.message_type not in filter_criteria.message_types:
+        # Sender filtering (membership checks run first so rejections skip the content scans)
+        if filter_criteria.blocked_senders and message.sender_id in filter_criteria.blocked_senders:
             return False
         
-        # Priority filtering
-        if filter_criteria.min_priority:
-            priority_order = {
-                MessagePriority.LOW: 0,
-                MessagePriority.NORMAL: 1,
-                MessagePriority.HIGH: 2,
-                MessagePriority.URGENT: 3
-            }
-            if priority_order.get(message.priority, 0) < priority_order.get(filter_criteria.min_priority, 0):
-                return False
-        
-        # Content keyword filtering
-        if filter_criteria.content_keywords:
-            content_lower = message.content.lower()
-            if not any(keyword.lower() in content_lower for keyword in filter_criteria.content_keywords):
-                return False
-        
-        # Content regex filtering
-        if filter_criteria.content_regex:
-            import re
-            if not re.search(filter_criteria.content_regex, message.content, re.IGNORECASE):
-                return False
-        
-        # Sender filtering
         if filter_criteria.allowed_senders and message.sender_id not in filter_criteria.allowed_senders:
             return False
         
-        if filter_criteria.blocked_senders and message.sender_id in filter_criteria.blocked_senders:
-            return False
-        
         # Role-based filtering
         if filter_criteria.allowed_roles and message.sender_role not in filter_criteria.allowed_roles:
             return False
@@ -247,12 +291,33 @@ class SubscriptionManager:
         if filter_criteria.blocked_roles and message.sender_role in filter_criteria.blocked_roles:
             return False
         
+        # Message type filtering
+        if filter_criteria.message_types and message.message_type not in filter_criteria.message_types:
+            return False
+        
+        # Priority filtering
+        if filter_criteria.min_priority:
+            if _PRIORITY_ORDER.get(message.priority, 0) < _PRIORITY_ORDER.get(filter_criteria.min_priority, 0):
+                return False
+        
         # Metadata filtering
         if filter_criteria.metadata_filters:
             for key, value in filter_criteria.metadata_filters.items():
                 if key not in message.metadata or message.metadata[key] != value:
                     return False
         
+        # Content keyword filtering
+        if filter_criteria.content_keywords:
+            if content_lower is None:
+                content_lower = message.content.lower()
+            if not filter_criteria._keyword_matcher()(content_lower):
+                return False
+        
+        # Content regex filtering
+        if filter_criteria.content_regex:
+            if not filter_criteria._compiled_regex().search(message.content):
+                return False
+        
         # Custom filter
         if filter_criteria.custom_filter:
             try:
@@ -272,7 +337,7 @@ class SubscriptionManager:
         Returns:
             List of subscriptions
         """
-        return self.agent_subscriptions.get(agent_id, [])
+        return list(self.agent_subscriptions.get(agent_id, {}).values())
     
     async def get_topic_subscribers(self, topic: str) -> List[TopicSubscription]:
         """Get all subscribers for a topic.
@@ -283,7 +348,7 @@ class SubscriptionManager:
         Returns:
             List of subscriptions
         """
-        return self.subscriptions.get(topic, [])
+        return list(self.subscriptions.get(topic, {}).values())
     
     async def update_subscription_filter(
         self,
@@ -301,13 +366,13 @@ class SubscriptionManager:
         Returns:
             True if successful, False otherwise
         """
-        for subscription in self.agent_subscriptions.get(agent_id, []):
-            if subscription.topic == topic:
-                subscription.filter_criteria = new_filter
-                logger.info(f"Updated filter for agent {agent_id} on topic {topic}")
-                return True
+        subscription = self.agent_subscriptions.get(agent_id, {}).get(topic)
+        if subscription is None:
+            return False
         
-        return False
+        subscription.filter_criteria = new_filter
+        logger.info(f"Updated filter for agent {agent_id} on topic {topic}")
+        return True
     
     async def pause_subscription(self, agent_id: str, topic: str) -> bool:
         """Pause a subscription without removing it.
@@ -319,13 +384,13 @@ class SubscriptionManager:
         Returns:
             True if successful, False otherwise
         """
-        for subscription in self.agent_subscriptions.get(agent_id, []):
-            if subscription.topic == topic:
-                subscription.active = False
-                logger.info(f"Paused subscription for agent {agent_id} on topic {topic}")
-                return True
+        subscription = self.agent_subscriptions.get(agent_id, {}).get(topic)
+        if subscription is None:
+            return False
         
-        return False
+        subscription.active = False
+        logger.info(f"Paused subscription for agent {agent_id} on topic {topic}")
+        return True
     
     async def resume_subscription(self, agent_id: str, topic: str) -> bool:
         """Resume a paused subscription.
@@ -337,13 +402,13 @@ class SubscriptionManager:
         Returns:
             True if successful, False otherwise
         """
-        for subscription in self.agent_subscriptions.get(agent_id, []):
-            if subscription.topic == topic:
-                subscription.active = True
-                logger.info(f"Resumed subscription for agent {agent_id} on topic {topic}")
-                return True
+        subscription = self.agent_subscriptions.get(agent_id, {}).get(topic)
+        if subscription is None:
+            return False
         
-        return False
+        subscription.active = True
+        logger.info(f"Resumed subscription for agent {agent_id} on topic {topic}")
+        return True
     
     async def get_subscription_stats(self) -> Dict[str, Any]:
         """Get subscription statistics.
@@ -353,7 +418,7 @@ class SubscriptionManager:
         """
         total_subscriptions = sum(len(subs) for subs in self.subscriptions.values())
         active_subscriptions = sum(
-            len([sub for sub in subs if sub.active]) 
+            len([sub for sub in subs.values() if sub.active]) 
             for subs in self.subscriptions.values()
         )
         
@@ -365,7 +430,7 @@ class SubscriptionManager:
             "total_agents": len(self.agent_subscriptions),
             "subscription_types": {
                 sub_type.value: sum(
-                    len([sub for sub in subs if sub.subscription_type == sub_type])
+                    len([sub for sub in subs.values() if sub.subscription_type == sub_type])
                     for subs in self.subscriptions.values()
                 )
                 for sub_type in SubscriptionType
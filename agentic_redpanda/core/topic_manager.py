@@ -1,6 +1,7 @@
 """Topic management for organizing agent communication."""
 
 import logging
+import sys
 from datetime import datetime
 from typing import Dict, List, Optional, Set
 
@@ -41,6 +42,7 @@ class TopicManager:
             logger.warning(f"Topic {name} already exists")
             return self.topics[name]
         
+        name = sys.intern(name)
         topic_info = TopicInfo(
             name=name,
             description=description,
@@ -112,6 +114,8 @@ class TopicManager:
             logger.error(f"Topic {topic_name} does not exist")
             return False
         
+        agent_id = sys.intern(agent_id)
+        topic_name = sys.intern(topic_name)
         if agent_id not in self.agent_subscriptions:
             self.agent_subscriptions[agent_id] = set()
         
@@ -55,6 +55,7 @@ class TopicValidator:
     def __init__(self):
         """Initialize the topic validator."""
         self.topic_permissions: Dict[str, List[TopicPermission]] = {}  # topic -> permissions
+        self.permissions_version = 0  # bumped on every grant/revoke so callers can cache checks
         self.reserved_topics: Set[str] = {
             "system", "admin", "config", "logs", "metrics", "health"
         }
@@ -180,6 +181,7 @@ class TopicValidator:
                 # Update existing permission
                 perm.permission_level = permission_level
                 perm.granted_by = granted_by
+                self.permissions_version += 1
                 logger.info(f"Updated permission for agent {agent_id} on topic {topic}")
                 return True
         
@@ -192,6 +194,7 @@ class TopicValidator:
         )
         
         self.topic_permissions[topic].append(permission)
+        self.permissions_version += 1
         logger.info(f"Granted {permission_level.value} permission to agent {agent_id} for topic {topic}")
         return True
     
@@ -222,6 +225,7 @@ class TopicValidator:
         ]
         
         if len(self.topic_permissions[topic]) < original_length:
+            self.permissions_version += 1
             logger.info(f"Revoked permission for agent {agent_id} on topic {topic}")
             return True
         
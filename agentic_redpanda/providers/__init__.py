@@ -1,6 +1,7 @@
 """LLM provider integrations."""
 
 from .base import LLMProvider, LLMResponse
+from .batcher import LLMBatcher
 from .openai_provider import OpenAIProvider
 from .ollama_provider import OllamaProvider
 from .claude_provider import ClaudeProvider
@@ -9,6 +10,7 @@ from .google_provider import GoogleProvider
 __all__ = [
     "LLMProvider",
     "LLMResponse", 
+    "LLMBatcher",
     "OpenAIProvider",
     "OllamaProvider",
     "ClaudeProvider",
@@ -1,5 +1,6 @@
 """Base classes for LLM provider implementations."""
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, Field
@@ -51,6 +52,31 @@ class LLMProvider(ABC):
         """
         pass
     
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        system_message: Optional[str] = None,
+        **kwargs: Any
+    ) -> List[LLMResponse]:
+        """
+        Generate text for several prompts sharing a system message.
+        
+        The default implementation issues the requests concurrently;
+        providers with a native batch endpoint should override it.
+        
+        Args:
+            prompts: The input prompts
+            system_message: Optional system message for context
+            **kwargs: Additional provider-specific parameters
+        
+        Returns:
+            LLMResponse objects in the same order as the prompts
+        """
+        return list(await asyncio.gather(*(
+            self.generate(prompt, system_message=system_message, **kwargs)
+            for prompt in prompts
+        )))
+    
     @abstractmethod
     async def generate_stream(
         self,
@@ -0,0 +1,121 @@
+"""Request coalescing for LLM providers."""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from .base import LLMProvider, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBatcher:
+    """Coalesces concurrent generate requests into batched provider calls.
+    
+    Requests submitted within ``max_delay_ms`` of the first queued request
+    are sent together through ``LLMProvider.generate_batch``. Identical
+    prompts with the same system message share a single generation.
+    """
+    
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        max_batch: int = 16,
+        max_delay_ms: int = 20,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ):
+        """Initialize the batcher.
+        
+        Args:
+            llm_provider: Provider that executes the batches
+            max_batch: Maximum number of requests collected per batch
+            max_delay_ms: Time to wait for more requests after the first
+            semaphore: Optional semaphore bounding concurrent batch calls
+        """
+        self.llm_provider = llm_provider
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self.semaphore = semaphore
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+    
+    async def submit(self, prompt: str, system_message: Optional[str] = None) -> LLMResponse:
+        """Queue a prompt and wait for its response.
+        
+        Args:
+            prompt: The input prompt
+            system_message: Optional system message for context
+        
+        Returns:
+            LLMResponse for the prompt
+        """
+        loop = asyncio.get_running_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        
+        future = loop.create_future()
+        self._queue.put_nowait((prompt, system_message, future))
+        
+        # The flusher exits once the queue is drained, so restart it on demand
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_loop())
+        
+        return await future
+    
+    async def _flush_loop(self) -> None:
+        """Collect queued requests into batches until the queue is empty."""
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        max_delay = self.max_delay_ms / 1000
+        
+        while not queue.empty():
+            batch = [queue.get_nowait()]
+            deadline = loop.time() + max_delay
+            while len(batch) < self.max_batch:
+                if queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(queue.get_nowait())
+            
+            task = loop.create_task(self._run_batch(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[str, Optional[str], asyncio.Future]]) -> None:
+        """Execute one batch, grouped by system message and deduplicated."""
+        groups: Dict[Optional[str], Dict[str, List[asyncio.Future]]] = {}
+        for prompt, system_message, future in batch:
+            groups.setdefault(system_message, {}).setdefault(prompt, []).append(future)
+        
+        for system_message, futures_by_prompt in groups.items():
+            prompts = list(futures_by_prompt)
+            try:
+                if self.semaphore is not None:
+                    async with self.semaphore:
+                        responses = await self.llm_provider.generate_batch(
+                            prompts, system_message=system_message
+                        )
+                else:
+                    responses = await self.llm_provider.generate_batch(
+                        prompts, system_message=system_message
+                    )
+            except Exception as e:
+                logger.error(f"Batched generation of {len(prompts)} prompts failed: {e}")
+                for futures in futures_by_prompt.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                continue
+            
+            for prompt, response in zip(prompts, responses):
+                for future in futures_by_prompt[prompt]:
+                    if not future.done():
+                        future.set_result(response)
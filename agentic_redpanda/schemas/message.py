@@ -5,6 +5,7 @@ from enum import Enum
 from typing import Any, Dict, List, Optional, Union
 from uuid import UUID, uuid4
 
+import orjson
 from pydantic import BaseModel, Field, validator
 
 
@@ -95,6 +96,16 @@ class AgentMessage(BaseModel):
         """Create message from dictionary."""
         return cls(**data)
     
+    def to_json_bytes(self) -> bytes:
+        """Serialize message to UTF-8 encoded JSON for publishing."""
+        return orjson.dumps(self.model_dump())
+    
+    @classmethod
+    def from_json_bytes(cls, data: bytes) -> "AgentMessage":
+        """Create message from UTF-8 encoded JSON."""
+        # pydantic-core parses and validates in one pass, without a Python dict
+        return cls.model_validate_json(data)
+    
     def is_expired(self) -> bool:
         """Check if message has expired based on TTL."""
         if self.ttl is None:
@@ -2,5 +2,6 @@
 
 from .config import load_config, Config
 from .logging import setup_logging
+from .runtime import install_uvloop
 
-__all__ = ["load_config", "Config", "setup_logging"]
+__all__ = ["load_config", "Config", "setup_logging", "install_uvloop"]
@@ -0,0 +1,38 @@
+"""Event loop setup for Agentic Redpanda."""
+
+import asyncio
+import logging
+import os
+import sys
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def install_uvloop(enabled: Optional[bool] = None) -> bool:
+    """Use uvloop's event loop policy for subsequent asyncio.run() calls.
+    
+    Must be called before the event loop is created. The
+    ``AGENTIC_REDPANDA_USE_UVLOOP`` environment variable (``0``/``false``
+    to disable) is consulted when ``enabled`` is not given.
+    
+    Args:
+        enabled: Whether to use uvloop; defaults to the environment setting
+        
+    Returns:
+        True if uvloop was installed, False otherwise
+    """
+    if enabled is None:
+        enabled = os.environ.get("AGENTIC_REDPANDA_USE_UVLOOP", "1").lower() not in ("0", "false", "no")
+    
+    if not enabled or sys.platform == "win32":
+        return False
+    
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.debug("Using uvloop event loop policy")
+    return True
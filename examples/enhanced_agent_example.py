@@ -10,7 +10,7 @@ from agentic_redpanda.core import (
 )
 from agentic_redpanda.providers import OpenAIProvider
 from agentic_redpanda.schemas.message import AgentMessage
-from agentic_redpanda.utils import setup_logging, load_config
+from agentic_redpanda.utils import setup_logging, load_config, install_uvloop
 
 # Set up logging
 setup_logging()
@@ -236,4 +236,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
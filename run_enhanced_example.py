@@ -9,7 +9,9 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+from agentic_redpanda.utils import install_uvloop
 from examples.enhanced_agent_example import main
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
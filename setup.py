@@ -29,6 +29,10 @@ setup(
     python_requires=">=3.9",
     install_requires=requirements,
     extras_require={
+        "speedups": [
+            "uvloop>=0.19.0; platform_system != 'Windows'",
+            "pyahocorasick>=2.0.0",
+        ],
         "dev": [
             "pytest>=7.4.3",
             "pytest-asyncio>=0.21.1",
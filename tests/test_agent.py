@@ -0,0 +1,339 @@
+"""Tests for the base agent."""
+
+import asyncio
+
+import pytest
+
+from agentic_redpanda.core.agent import Agent
+from agentic_redpanda.core.topic_manager import TopicManager
+from agentic_redpanda.providers.base import LLMProvider, LLMResponse
+from agentic_redpanda.schemas.message import AgentMessage, MessageType
+
+
+class FakeProvider(LLMProvider):
+    """LLM provider returning canned responses."""
+    
+    def __init__(self):
+        super().__init__({"model": "fake"})
+    
+    async def generate(self, prompt, system_message=None, **kwargs):
+        return LLMResponse(content=f"echo: {prompt}", model=self.model)
+    
+    async def generate_stream(self, prompt, system_message=None, **kwargs):
+        yield await self.generate(prompt, system_message)
+    
+    async def chat(self, messages, **kwargs):
+        return LLMResponse(content="chat", model=self.model)
+    
+    async def get_embeddings(self, texts, **kwargs):
+        return [[0.0] for _ in texts]
+    
+    async def health_check(self):
+        return True
+
+
+class FakeBroker:
+    """In-memory stand-in for MessageBroker."""
+    
+    def __init__(self):
+        self.running = True
+        self.published = []
+        self.batches = []
+        self.drained = False
+        self.subscriptions = {}
+        self.topic_manager = TopicManager()
+    
+    async def start(self):
+        self.running = True
+    
+    async def publish_message(self, message):
+        self.published.append(message)
+    
+    async def publish_batch(self, messages):
+        self.batches.append(list(messages))
+        self.published.extend(messages)
+    
+    async def drain(self):
+        self.drained = True
+    
+    async def subscribe_to_topic(self, topic, agent_id, handler):
+        self.subscriptions[topic] = handler
+    
+    async def subscribe_to_topic_batch(self, topic, agent_id, handler, batch_size=20, key_filter=None):
+        self.subscriptions[topic] = handler
+    
+    async def unsubscribe_from_topic(self, topic):
+        self.subscriptions.pop(topic, None)
+    
+    async def unsubscribe_all(self, agent_id):
+        self.subscriptions.clear()
+
+
+class EchoAgent(Agent):
+    """Minimal concrete agent."""
+    
+    async def process_message(self, message):
+        return None
+
+
+@pytest.fixture
+def broker():
+    return FakeBroker()
+
+
+@pytest.fixture
+def agent(broker):
+    return EchoAgent(
+        agent_id="agent-1",
+        agent_name="Agent One",
+        role="test",
+        llm_provider=FakeProvider(),
+        message_broker=broker,
+        topics=["general"],
+        config={"max_batch_size": 4, "max_delay_ms": 5}
+    )
+
+
+class TestAgent:
+    """Test cases for Agent."""
+    
+    async def test_send_message_batches_publishes(self, agent, broker):
+        """Messages sent while running are published in batches."""
+        await agent.start()
+        
+        for i in range(10):
+            await agent.send_message(f"message {i}", "general")
+        
+        await agent.stop()
+        
+        assert [m.content for m in broker.published] == [f"message {i}" for i in range(10)]
+        assert all(len(batch) <= 4 for batch in broker.batches)
+        assert len(broker.batches) >= 3
+        assert broker.drained
+    
+    async def test_send_message_before_start_publishes_directly(self, agent, broker):
+        """Messages sent before start bypass the send queue."""
+        message_id = await agent.send_message("hello", "general")
+        
+        assert len(broker.published) == 1
+        assert str(broker.published[0].id) == message_id
+        assert broker.batches == []
+    
+    async def test_handle_batch_skips_own_messages(self, agent, broker):
+        """Batch handling drops self-messages and answers the rest."""
+        own = AgentMessage(
+            sender_id="agent-1",
+            sender_name="Agent One",
+            sender_role="test",
+            message_type=MessageType.TEXT,
+            content="from me",
+            topic="general"
+        )
+        other = AgentMessage(
+            sender_id="agent-2",
+            sender_name="Agent Two",
+            sender_role="test",
+            message_type=MessageType.QUERY,
+            content="what time is it?",
+            topic="general"
+        )
+        
+        await agent._handle_batch([own, other])
+        await asyncio.gather(*agent._handler_tasks)
+        
+        assert len(agent.conversation_history) == 2
+        assert agent.conversation_history[0]["content"] == "[Agent Two] what time is it?"
+        assert [m.content for m in broker.published] == ["echo: what time is it?"]
+        assert broker.published[0].message_type == MessageType.RESPONSE
+        assert agent.last_activity == other.timestamp
+    
+    async def test_handle_batch_runs_handlers_off_the_poll_loop(self, agent):
+        """Batch handling starts handlers in arrival order without awaiting them."""
+        agent.handler_concurrency = 2
+        release = asyncio.Event()
+        started = []
+        
+        async def handle(message):
+            started.append(message.content)
+            await release.wait()
+        
+        agent.message_handlers[MessageType.TEXT] = handle
+        agent.message_handlers[MessageType.QUERY] = handle
+        messages = [
+            AgentMessage(
+                sender_id="agent-2",
+                sender_name="Agent Two",
+                sender_role="test",
+                message_type=message_type,
+                content=str(i),
+                topic="general"
+            )
+            for i, message_type in enumerate([MessageType.TEXT, MessageType.QUERY, MessageType.TEXT])
+        ]
+        
+        await agent._handle_batch(messages[:2])
+        await asyncio.sleep(0)
+        assert started == ["0", "1"]
+        
+        pending = asyncio.ensure_future(agent._handle_batch(messages[2:]))
+        await asyncio.sleep(0)
+        assert not pending.done()
+        
+        release.set()
+        await pending
+        await asyncio.gather(*agent._handler_tasks)
+        assert started == ["0", "1", "2"]
+    
+    async def test_conversation_history_is_bounded(self, broker):
+        """Conversation history keeps only the most recent entries."""
+        agent = EchoAgent(
+            agent_id="agent-1",
+            agent_name="Agent One",
+            role="test",
+            llm_provider=FakeProvider(),
+            message_broker=broker,
+            config={"history_limit": 3}
+        )
+        
+        for i in range(5):
+            await agent._generate_response(f"prompt {i}")
+        
+        assert len(agent.conversation_history) == 3
+        assert agent.conversation_history[0]["content"] == "echo: prompt 2"
+    
+    async def test_get_status_caches_llm_health(self, agent):
+        """Repeated status calls reuse a recent health check."""
+        calls = []
+        
+        async def health_check():
+            calls.append(1)
+            return True
+        
+        agent.llm_provider.health_check = health_check
+        
+        first = await agent.get_status()
+        second = await agent.get_status()
+        
+        assert first["llm_healthy"] and second["llm_healthy"]
+        assert len(calls) == 1
+    
+    async def test_llm_concurrency_is_shared_between_agents(self, broker):
+        """Agents on the same provider endpoint share one request limit."""
+        provider = FakeProvider()
+        in_flight = []
+        peak = []
+        
+        async def generate(prompt, system_message=None, **kwargs):
+            in_flight.append(prompt)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(prompt)
+            return LLMResponse(content=prompt, model="fake")
+        
+        provider.generate = generate
+        agents = [
+            EchoAgent(
+                agent_id=f"agent-{i}",
+                agent_name=f"Agent {i}",
+                role="test",
+                llm_provider=provider,
+                message_broker=broker,
+                config={"llm_concurrency": 2}
+            )
+            for i in range(3)
+        ]
+        
+        await asyncio.gather(*(
+            agent._generate_response(f"{agent.agent_id} prompt {i}")
+            for agent in agents
+            for i in range(3)
+        ))
+        
+        assert max(peak) == 2
+    
+    async def test_llm_batching_coalesces_identical_prompts(self, broker):
+        """Identical concurrent prompts share one generation when batching."""
+        provider = FakeProvider()
+        prompts = []
+        
+        async def generate(prompt, system_message=None, **kwargs):
+            prompts.append(prompt)
+            return LLMResponse(content=f"echo: {prompt}", model="fake")
+        
+        provider.generate = generate
+        agents = [
+            EchoAgent(
+                agent_id=f"agent-{i}",
+                agent_name="Agent",
+                role="test",
+                llm_provider=provider,
+                message_broker=broker,
+                config={"llm_batch_delay_ms": 5}
+            )
+            for i in range(2)
+        ]
+        
+        responses = await asyncio.gather(
+            agents[0]._generate_response("status?"),
+            agents[1]._generate_response("status?"),
+            agents[0]._generate_response("other"),
+        )
+        
+        assert responses == ["echo: status?", "echo: status?", "echo: other"]
+        assert sorted(prompts) == ["other", "status?"]
+    
+    async def test_notifications_are_logged_without_reply(self, agent, broker, caplog):
+        """Notifications are logged and never answered."""
+        notification = AgentMessage(
+            sender_id="agent-2",
+            sender_name="Agent Two",
+            sender_role="test",
+            message_type=MessageType.NOTIFICATION,
+            content="deploy finished",
+            topic="general"
+        )
+        
+        with caplog.at_level("INFO"):
+            await agent._handle_batch([notification])
+            await asyncio.gather(*agent._handler_tasks)
+            await agent._handle_message(notification)
+        
+        assert broker.published == []
+        assert caplog.text.count("Notification from Agent Two: deploy finished") == 2
+    
+    async def test_replaced_notification_handler_is_awaited(self, agent):
+        """A registered notification handler replaces the default logging."""
+        handled = []
+        
+        async def handle(message):
+            handled.append(message.content)
+        
+        agent.message_handlers[MessageType.NOTIFICATION] = handle
+        notification = AgentMessage(
+            sender_id="agent-2",
+            sender_name="Agent Two",
+            sender_role="test",
+            message_type=MessageType.NOTIFICATION,
+            content="deploy finished",
+            topic="general"
+        )
+        
+        await agent._handle_batch([notification])
+        await asyncio.gather(*agent._handler_tasks)
+        await agent._handle_message(notification)
+        
+        assert handled == ["deploy finished", "deploy finished"]
+    
+    async def test_send_text_matches_send_message(self, agent, broker):
+        """The unvalidated fast path builds the same message as send_message."""
+        await agent.send_text("  hello  ", "general", reply_to="agent-2")
+        await agent.send_message("  hello  ", "general", reply_to="agent-2")
+        
+        fast, full = broker.published
+        assert fast.model_dump(exclude={"id", "timestamp"}) == full.model_dump(exclude={"id", "timestamp"})
+        assert AgentMessage.from_json_bytes(fast.to_json_bytes()) == fast
+    
+    async def test_send_text_validates_empty_content(self, agent):
+        """Empty content still fails validation on the fast path."""
+        with pytest.raises(ValueError, match="Message content cannot be empty"):
+            await agent.send_text("   ", "general")
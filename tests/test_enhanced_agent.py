@@ -0,0 +1,206 @@
+"""Tests for the enhanced agent."""
+
+import asyncio
+
+import pytest
+
+from agentic_redpanda.core.enhanced_agent import EnhancedAgent
+from agentic_redpanda.schemas.message import AgentMessage, MessageType
+from agentic_redpanda.core.topic_validator import PermissionLevel
+from tests.test_agent import FakeBroker, FakeProvider
+
+
+@pytest.fixture
+def broker():
+    return FakeBroker()
+
+
+@pytest.fixture
+async def agent(broker):
+    return EnhancedAgent(
+        agent_id="enhanced-1",
+        agent_name="Enhanced One",
+        role="test",
+        llm_provider=FakeProvider(),
+        message_broker=broker,
+        config={"max_batch_size": 4, "max_delay_ms": 5}
+    )
+
+
+class TestEnhancedAgent:
+    """Test cases for EnhancedAgent."""
+    
+    async def test_send_message_batches_publishes(self, agent, broker):
+        """Messages sent while running are published in batches."""
+        await agent.start()
+        
+        for i in range(10):
+            await agent.send_message(f"message {i}", "general")
+        
+        await agent.stop()
+        
+        assert [m.content for m in broker.published] == [f"message {i}" for i in range(10)]
+        assert all(len(batch) <= 4 for batch in broker.batches)
+        assert len(broker.batches) >= 3
+    
+    async def test_send_message_before_start_publishes_directly(self, agent, broker):
+        """Messages sent before start bypass the publish queue."""
+        message_id = await agent.send_message("hello", "general")
+        await asyncio.gather(*agent._publish_tasks)
+        
+        assert [str(m.id) for m in broker.published] == [message_id]
+        assert broker.batches == []
+    
+    async def test_start_subscribes_with_shared_default_filter(self, broker):
+        """Every topic subscribed at start shares the default role filter."""
+        agent = EnhancedAgent(
+            agent_id="enhanced-2",
+            agent_name="Enhanced Two",
+            role="test",
+            llm_provider=FakeProvider(),
+            message_broker=broker,
+            topics=["alpha", "beta"]
+        )
+        await agent.start()
+        
+        assert set(broker.subscriptions) == {"alpha", "beta"}
+        subscriptions = await agent.subscription_manager.get_agent_subscriptions("enhanced-2")
+        assert {id(s.filter_criteria) for s in subscriptions} == {id(agent._default_sub_filter)}
+        
+        await agent.stop()
+    
+    async def test_start_installs_default_routing_rules_once(self, agent):
+        """Default routing rules are installed by start, not construction."""
+        assert agent.message_router.routing_rules == []
+        
+        await agent.start()
+        await agent.stop()
+        await agent.start()
+        
+        rule_ids = [rule.rule_id for rule in agent.message_router.routing_rules]
+        assert rule_ids == ["high_priority_urgent", "task_routing"]
+        
+        await agent.stop()
+    
+    async def test_get_agent_status(self, agent):
+        """Status gathers the stats of every manager."""
+        status = await agent.get_agent_status()
+        
+        assert status["llm_healthy"] is True
+        assert status["conversation_stats"]["total_threads"] == 0
+        assert status["error_stats"]["total_errors"] == 0
+        assert "subscription_stats" in status and "routing_stats" in status
+    
+    async def test_failed_publish_is_reported_to_error_handler(self, agent, broker):
+        """A failing background publish is recorded before stop returns."""
+        async def failing_publish(message):
+            raise ConnectionError("connection refused")
+        
+        broker.publish_message = failing_publish
+        await agent.send_message("hello", "general")
+        await agent.stop()
+        
+        errors = await agent.error_handler.get_recent_errors()
+        assert [e.error_type for e in errors] == ["network_error"]
+    
+    async def test_read_permission_cache_follows_grants(self, agent):
+        """Cached permission checks are refreshed after a grant."""
+        assert not await agent._can_read("general")
+        assert dict(agent._perm_cache) == {"general": False}
+        
+        await agent.topic_validator.grant_permission(
+            "general", "enhanced-1", PermissionLevel.READ, "admin"
+        )
+        
+        assert await agent._can_read("general")
+    
+    async def test_notifications_are_handled_inline(self, agent, caplog):
+        """The default notification handler runs without a coroutine."""
+        await agent.topic_validator.grant_permission(
+            "general", "enhanced-1", PermissionLevel.READ, "admin"
+        )
+        
+        with caplog.at_level("INFO"):
+            await agent._handle_message_advanced(AgentMessage(
+                sender_id="other",
+                sender_name="Other",
+                sender_role="peer",
+                content="heads up",
+                topic="general",
+                message_type=MessageType.NOTIFICATION
+            ))
+        
+        assert "Notification from Other: heads up" in caplog.text
+    
+    async def test_replaced_notification_handler_is_awaited(self, agent):
+        """A registered notification handler replaces the inline default."""
+        handled = []
+        
+        async def handle(message, context=None):
+            handled.append(message.content)
+        
+        agent.message_handlers[MessageType.NOTIFICATION] = handle
+        await agent.topic_validator.grant_permission(
+            "general", "enhanced-1", PermissionLevel.READ, "admin"
+        )
+        
+        await agent._handle_message_advanced(AgentMessage(
+            sender_id="other",
+            sender_name="Other",
+            sender_role="peer",
+            content="heads up",
+            topic="general",
+            message_type=MessageType.NOTIFICATION
+        ))
+        
+        assert handled == ["heads up"]
+    
+    async def test_message_delivered_twice_is_threaded_once(self, agent):
+        """A message routed to several subscribed topics is threaded once."""
+        await agent.topic_validator.grant_permission(
+            "general", "enhanced-1", PermissionLevel.READ, "admin"
+        )
+        message = AgentMessage(
+            sender_id="other",
+            sender_name="Other",
+            sender_role="peer",
+            content="status update",
+            topic="general",
+            message_type=MessageType.NOTIFICATION
+        )
+        
+        await agent._handle_message_advanced(message)
+        thread_id = agent.conversation_manager.message_threads[message.id]
+        stored = len(agent.conversation_manager.thread_messages[thread_id])
+        
+        await agent._handle_message_advanced(message)
+        
+        assert len(agent.conversation_manager.thread_messages[thread_id]) == stored
+    
+    async def test_dispatched_messages_are_tracked_until_handled(self, agent):
+        """Messages from synchronous callbacks are handled in tracked tasks."""
+        handled = []
+        
+        async def handle(message, context=None):
+            await asyncio.sleep(0.01)
+            handled.append(message.content)
+        
+        agent.message_handlers[MessageType.TASK] = handle
+        await agent.topic_validator.grant_permission(
+            "general", "enhanced-1", PermissionLevel.READ, "admin"
+        )
+        
+        agent._dispatch_message(AgentMessage(
+            sender_id="other",
+            sender_name="Other",
+            sender_role="peer",
+            content="do it",
+            topic="general",
+            message_type=MessageType.TASK
+        ))
+        assert len(agent._handler_tasks) == 1
+        
+        await agent.stop()
+        
+        assert handled == ["do it"]
+        assert not agent._handler_tasks
@@ -9,6 +9,8 @@ from agentic_redpanda.core import (
     MessageRouter, RoutingRuleType, TopicValidator, TopicType,
     ErrorHandler, RetryConfig, RetryStrategy, ConversationManager
 )
+from agentic_redpanda.core import message_router as message_router_module
+from agentic_redpanda.core import subscription_manager as subscription_manager_module
 from agentic_redpanda.schemas.message import AgentMessage, MessageType, MessagePriority
 
 
@@ -42,6 +44,27 @@ class TestSubscriptionManager:
         assert subscription.topic == "test-topic"
         assert subscription.subscription_type == SubscriptionType.ALL_MESSAGES
     
+    async def test_resubscribe_and_unsubscribe(self, subscription_manager):
+        """Test resubscribing replaces a subscription and unsubscribing removes only it."""
+        await subscription_manager.subscribe_agent_to_topic("agent-1", "test-topic")
+        replacement = await subscription_manager.subscribe_agent_to_topic(
+            "agent-1", "test-topic", subscription_type=SubscriptionType.CONTENT_FILTERED
+        )
+        await subscription_manager.subscribe_agent_to_topic("agent-2", "test-topic")
+        await subscription_manager.subscribe_agent_to_topic("agent-1", "other-topic")
+        
+        assert await subscription_manager.get_agent_subscriptions("agent-1") == [
+            replacement,
+            subscription_manager.subscriptions["other-topic"]["agent-1"]
+        ]
+        
+        assert await subscription_manager.unsubscribe_agent_from_topic("agent-1", "test-topic")
+        
+        subscribers = await subscription_manager.get_topic_subscribers("test-topic")
+        assert [sub.agent_id for sub in subscribers] == ["agent-2"]
+        assert list(subscription_manager.agent_subscriptions["agent-1"]) == ["other-topic"]
+        assert not await subscription_manager.pause_subscription("agent-1", "test-topic")
+    
     async def test_message_routing(self, subscription_manager, sample_message):
         """Test message routing to subscribers."""
         # Subscribe agent
@@ -95,6 +118,46 @@ class TestSubscriptionManager:
         
         matching = await subscription_manager.route_message(normal_message)
         assert len(matching) == 0
+    
+    async def test_regex_filtering(self, subscription_manager, sample_message):
+        """Test regex filters are case-insensitive and follow pattern changes."""
+        filter_criteria = SubscriptionFilter(content_regex=r"^hello")
+        await subscription_manager.subscribe_agent_to_topic(
+            agent_id="agent-1",
+            topic="test-topic",
+            filter_criteria=filter_criteria
+        )
+        
+        assert len(await subscription_manager.route_message(sample_message)) == 1
+        
+        filter_criteria.content_regex = r"^goodbye"
+        assert await subscription_manager.route_message(sample_message) == []
+    
+    @pytest.mark.parametrize("use_automaton", [True, False])
+    async def test_long_keyword_filter(
+        self, subscription_manager, sample_message, monkeypatch, use_automaton
+    ):
+        """Test long keyword lists match with or without pyahocorasick."""
+        if not use_automaton:
+            monkeypatch.setattr(subscription_manager_module, "ahocorasick", None)
+        keywords = [f"keyword-{i}" for i in range(40)]
+        filter_criteria = SubscriptionFilter(content_keywords=keywords)
+        await subscription_manager.subscribe_agent_to_topic(
+            agent_id="agent-1",
+            topic="test-topic",
+            filter_criteria=filter_criteria
+        )
+        
+        assert await subscription_manager.route_message(sample_message) == []
+        
+        keywords.append("HELLO")
+        assert len(await subscription_manager.route_message(sample_message)) == 1
+        
+        filter_criteria.content_keywords = keywords[:-1]
+        assert await subscription_manager.route_message(sample_message) == []
+        
+        filter_criteria.content_keywords[0] = "world"
+        assert len(await subscription_manager.route_message(sample_message)) == 1
 
 
 class TestMessageRouter:
@@ -156,6 +219,155 @@ class TestMessageRouter:
         # Test normal message
         target_topics = await message_router.route_message(sample_message)
         assert len(target_topics) == 0
+    
+    async def test_update_rule_recompiles_condition(self, message_router, sample_message):
+        """Updating a rule's condition takes effect on the next route."""
+        await message_router.add_routing_rule(
+            rule_id="regex-rule",
+            rule_type=RoutingRuleType.CONTENT_REGEX,
+            condition=r"^goodbye",
+            target_topics=["regex-topic"]
+        )
+        assert await message_router.route_message(sample_message) == []
+        
+        await message_router.update_rule("regex-rule", condition=r"^hello")
+        
+        assert await message_router.route_message(sample_message) == ["regex-topic"]
+    
+    async def test_direct_rule_edits_recompile(self, message_router, sample_message):
+        """Assigning a rule's condition or type directly takes effect on the next route."""
+        rule = await message_router.add_routing_rule(
+            rule_id="keyword-rule",
+            rule_type=RoutingRuleType.CONTENT_KEYWORD,
+            condition=["goodbye"],
+            target_topics=["keyword-topic"]
+        )
+        assert await message_router.route_message(sample_message) == []
+        
+        rule.condition = ["hello"]
+        assert await message_router.route_message(sample_message) == ["keyword-topic"]
+        
+        rule.rule_type = RoutingRuleType.CONTENT_REGEX
+        rule.condition = r"^goodbye"
+        assert await message_router.route_message(sample_message) == []
+    
+    async def test_invalid_rule_never_matches(self, message_router, sample_message):
+        """A rule whose condition cannot be compiled matches nothing."""
+        await message_router.add_routing_rule(
+            rule_id="bad-regex",
+            rule_type=RoutingRuleType.CONTENT_REGEX,
+            condition="(",
+            target_topics=["never"]
+        )
+        
+        assert await message_router.route_message(sample_message) == []
+    
+    @pytest.mark.parametrize("use_automaton", [True, False])
+    async def test_keyword_rules_match_in_one_scan(
+        self, message_router, sample_message, monkeypatch, use_automaton
+    ):
+        """Test keyword rules match case-insensitively with or without pyahocorasick."""
+        if not use_automaton:
+            monkeypatch.setattr(message_router_module, "ahocorasick", None)
+        await message_router.add_routing_rule(
+            rule_id="greeting",
+            rule_type=RoutingRuleType.CONTENT_KEYWORD,
+            condition=["HELLO", "hi there"],
+            target_topics=["greetings"],
+            priority=10
+        )
+        await message_router.add_routing_rule(
+            rule_id="world",
+            rule_type=RoutingRuleType.CONTENT_KEYWORD,
+            condition="world",
+            target_topics=["planet"]
+        )
+        await message_router.add_routing_rule(
+            rule_id="farewell",
+            rule_type=RoutingRuleType.CONTENT_KEYWORD,
+            condition=["goodbye"],
+            target_topics=["farewells"]
+        )
+        
+        assert sorted(await message_router.route_message(sample_message)) == ["greetings", "planet"]
+        
+        await message_router.update_rule("farewell", condition=["world!"])
+        assert "farewells" in await message_router.route_message(sample_message)
+        
+        history = await message_router.get_route_history(limit=1)
+        assert history[0].rule_ids == ("greeting", "world", "farewell")
+    
+    async def test_redundant_rules_are_skipped(self, message_router, sample_message):
+        """Test rules whose targets are already covered are not evaluated."""
+        evaluated = []
+        for rule_id, rule_type, condition, target_topics in [
+            ("role", RoutingRuleType.SENDER_ROLE, "test", ["shared"]),
+            ("type", RoutingRuleType.MESSAGE_TYPE, MessageType.TEXT, ["shared"]),
+            ("custom", RoutingRuleType.CUSTOM, lambda m: evaluated.append(m.id) or True, ["shared"]),
+            ("untargeted", RoutingRuleType.SENDER_ROLE, "test", []),
+        ]:
+            await message_router.add_routing_rule(
+                rule_id=rule_id,
+                rule_type=rule_type,
+                condition=condition,
+                target_topics=target_topics,
+                priority=10 if rule_id == "role" else 0
+            )
+        
+        assert await message_router.route_message(sample_message) == ["shared"]
+        assert evaluated == [sample_message.id]
+        route = (await message_router.get_route_history(limit=1))[0]
+        assert route.rule_ids == ("role", "custom", "untargeted")
+        
+        message_router.skip_redundant_rules = False
+        await message_router.route_message(sample_message)
+        route = (await message_router.get_route_history(limit=1))[0]
+        assert route.rule_ids == ("role", "type", "custom", "untargeted")
+    
+    async def test_rules_are_looked_up_by_id(self, message_router, sample_message):
+        """Test rule lookup, disabling and removal by rule ID."""
+        for rule_id in ("first", "second"):
+            await message_router.add_routing_rule(
+                rule_id=rule_id,
+                rule_type=RoutingRuleType.SENDER_ROLE,
+                condition="test",
+                target_topics=[f"{rule_id}-topic"]
+            )
+        
+        assert (await message_router.get_rule_by_id("second")).target_topics == ["second-topic"]
+        assert await message_router.disable_rule("first")
+        assert await message_router.route_message(sample_message) == ["second-topic"]
+        
+        assert await message_router.remove_routing_rule("second")
+        assert await message_router.get_rule_by_id("second") is None
+        assert not await message_router.remove_routing_rule("second")
+        assert [rule.rule_id for rule in message_router.routing_rules] == ["first"]
+    
+    async def test_route_history_is_bounded(self, message_router, sample_message):
+        """Test route history keeps only the most recent routes."""
+        message_router.max_history_size = 3
+        messages = [sample_message.copy(update={"id": uuid4()}) for _ in range(5)]
+        for i, message in enumerate(messages):
+            if i == 3:
+                await message_router.add_routing_rule(
+                    rule_id="role",
+                    rule_type=RoutingRuleType.SENDER_ROLE,
+                    condition="test",
+                    target_topics=["a", "b"]
+                )
+            await message_router.route_message(message)
+        
+        history = await message_router.get_route_history(limit=2)
+        assert [route.message_id for route in history] == [m.id for m in messages[-2:]]
+        assert len(await message_router.get_route_history()) == 3
+        
+        stats = await message_router.get_routing_stats()
+        assert stats["total_routes"] == 3
+        assert stats["average_targets_per_route"] == 4 / 3
+        
+        message_router.max_history_size = 1
+        assert [route.message_id for route in message_router.route_history] == [messages[-1].id]
+        assert (await message_router.get_routing_stats())["average_targets_per_route"] == 2
 
 
 class TestTopicValidator:
@@ -252,6 +464,26 @@ class TestErrorHandler:
         validation_error = ValueError("Invalid input")
         is_retryable = await error_handler.is_error_retryable(validation_error)
         assert not is_retryable
+    
+    def test_retry_delays_follow_backoff_with_jitter(self, error_handler):
+        """Test retry delays stay within the jitter band of the backoff."""
+        for attempt, expected in enumerate([1.0, 2.0, 4.0, 8.0]):
+            delay = error_handler._calculate_delay(attempt)
+            assert expected * 0.95 <= delay <= expected * 1.05
+    
+    async def test_error_history_is_bounded(self, error_handler):
+        """Test error history keeps only the most recent errors."""
+        error_handler.max_history_size = 3
+        for i in range(5):
+            await error_handler.handle_error(ValueError(f"bad value {i}"))
+        
+        assert [e.error_message for e in error_handler.error_history] == [
+            "bad value 2", "bad value 3", "bad value 4"
+        ]
+        recent = await error_handler.get_recent_errors(limit=2)
+        assert len(recent) == 2
+        assert recent[0].timestamp >= recent[1].timestamp
+        assert (await error_handler.get_error_stats())["total_errors"] == 3
 
 
 class TestConversationManager:
@@ -306,9 +538,26 @@ class TestConversationManager:
         assert thread_id == thread.thread_id
         
         # Check thread messages
-        messages = await conversation_manager.get_thread_messages(thread.thread_id)
+        messages = conversation_manager.get_thread_messages(thread.thread_id)
         assert len(messages) == 2
     
+    async def test_add_messages_to_thread(self, conversation_manager, sample_message):
+        """Test batch ingestion groups messages into their topic threads."""
+        batch = [
+            sample_message,
+            sample_message.copy(update={"id": uuid4(), "sender_id": "agent-2"}),
+            sample_message.copy(update={"id": uuid4(), "topic": "other-topic"}),
+        ]
+        
+        added = await conversation_manager.add_messages_to_thread(batch)
+        assert sorted(len(ids) for ids in added.values()) == [1, 2]
+        
+        thread_id = conversation_manager.active_thread_by_topic["test-topic"]
+        assert added[thread_id] == [batch[0].id, batch[1].id]
+        assert conversation_manager.threads[thread_id].participants == {"test-agent", "agent-2"}
+        context = conversation_manager.get_conversation_context(thread_id)
+        assert list(context.recent_messages)[-2:] == batch[:2]
+    
     async def test_conversation_context(self, conversation_manager, sample_message):
         """Test conversation context management."""
         # Create thread
@@ -318,8 +567,158 @@ class TestConversationManager:
         )
         
         # Get context
-        context = await conversation_manager.get_conversation_context(thread.thread_id)
+        context = conversation_manager.get_conversation_context(thread.thread_id)
         assert context is not None
         assert context.topic == "test-topic"
         assert len(context.recent_messages) == 1
         assert sample_message.sender_id in context.participants
+    
+    async def test_topic_thread_reuse(self, conversation_manager, sample_message):
+        """Test messages on a topic reuse its active thread until closed."""
+        first = await conversation_manager.add_message_to_thread(sample_message)
+        second = await conversation_manager.add_message_to_thread(sample_message.copy())
+        assert first == second
+        
+        conversation_manager.close_thread(first, "test-agent")
+        third = await conversation_manager.add_message_to_thread(sample_message.copy())
+        assert third != first
+        assert conversation_manager.active_thread_by_topic["test-topic"] == third
+    
+    async def test_search_threads(self, conversation_manager, sample_message):
+        """Test thread search matches words, partial words and phrases."""
+        thread = await conversation_manager.create_thread(
+            topic="test-topic",
+            initial_message=sample_message,
+            title="Greetings"
+        )
+        
+        for query in ["hello", "ELL", "lo, wor", "greet", "world!"]:
+            results = await conversation_manager.search_threads(query)
+            assert [t.thread_id for t in results] == [thread.thread_id], query
+        
+        assert await conversation_manager.search_threads("hello there") == []
+        assert await conversation_manager.search_threads("hello", topic="other-topic") == []
+    
+    async def test_token_index_narrows_partial_words(self, conversation_manager, sample_message):
+        """Test the token index narrows by whole words, prefixes and suffixes."""
+        hello = await conversation_manager.create_thread("topic-a", sample_message)
+        goodbye = await conversation_manager.create_thread(
+            "topic-b", sample_message.copy(update={"id": uuid4(), "content": "Goodbye, yellow world"})
+        )
+        candidates = conversation_manager._indexed_candidates
+        
+        assert candidates("ell") is None
+        assert candidates("lo, wor") == {hello.thread_id}
+        assert candidates("ow wor") == {goodbye.thread_id}
+        assert candidates(", world") == {hello.thread_id, goodbye.thread_id}
+        assert candidates("goodbye, yellow world") == {goodbye.thread_id}
+        assert candidates("x, yz") == set()
+    
+    async def test_token_index_forgets_evicted_messages(self, sample_message):
+        """Test evicted messages are removed from the token index."""
+        conversation_manager = ConversationManager(max_context_messages=1)
+        thread = await conversation_manager.create_thread("test-topic", sample_message, title="Chat")
+        for i in range(10):
+            await conversation_manager.add_message_to_thread(
+                sample_message.copy(update={"id": uuid4(), "content": f"token{i}"}), thread.thread_id
+            )
+        
+        assert set(conversation_manager._token_to_threads) == {"chat", "token8", "token9"}
+        assert conversation_manager._indexed_candidates("chat token9") == {thread.thread_id}
+        assert conversation_manager._indexed_candidates("chat token1") == set()
+    
+    async def test_batch_search_threads(self, conversation_manager, sample_message):
+        """Test batch search agrees with searching each query separately."""
+        await conversation_manager.create_thread("topic-a", sample_message)
+        await conversation_manager.create_thread(
+            "topic-b", sample_message.copy(update={"id": uuid4(), "content": "Goodbye"})
+        )
+        
+        queries = ["hello", "HELLO", "bye", "missing"]
+        results = await conversation_manager.batch_search_threads(queries)
+        assert list(results) == queries
+        for query in queries:
+            assert results[query] == await conversation_manager.search_threads(query)
+    
+    async def test_search_threads_limit(self, conversation_manager, sample_message):
+        """Test thread search stops once the limit is reached."""
+        for topic in ["topic-a", "topic-b", "topic-c"]:
+            await conversation_manager.create_thread(topic, sample_message.copy(update={"topic": topic}))
+        
+        assert len(await conversation_manager.search_threads("hello")) == 3
+        assert len(await conversation_manager.search_threads("hello", limit=2)) == 2
+    
+    async def test_thread_stats(self, conversation_manager, sample_message):
+        """Test thread statistics track creates, messages and closes."""
+        thread = await conversation_manager.create_thread("test-topic", sample_message)
+        await conversation_manager.add_message_to_thread(sample_message.copy(), thread.thread_id)
+        conversation_manager.close_thread(thread.thread_id, "test-agent")
+        conversation_manager.close_thread(thread.thread_id, "test-agent")
+        
+        stats = conversation_manager.get_thread_stats()
+        assert stats["total_threads"] == 1
+        assert stats["active_threads"] == 0
+        assert stats["archived_threads"] == 1
+        assert stats["total_messages"] == 2
+        assert stats["threads_by_topic"] == {"test-topic": 1}
+    
+    async def test_thread_messages_are_bounded(self, sample_message):
+        """Test thread history evicts the oldest messages and their index entries."""
+        conversation_manager = ConversationManager(max_context_messages=2)
+        thread = await conversation_manager.create_thread("test-topic", sample_message)
+        messages = [sample_message.copy(update={"id": uuid4()}) for _ in range(5)]
+        for message in messages:
+            await conversation_manager.add_message_to_thread(message, thread.thread_id)
+        
+        assert conversation_manager.get_thread_messages(thread.thread_id) == messages[-4:]
+        assert set(conversation_manager.message_threads) == {m.id for m in messages[-4:]}
+        assert conversation_manager.get_thread_stats()["total_messages"] == 4
+        
+        stats = await conversation_manager.cleanup_old_data()
+        assert stats["removed_messages"] == 2
+    
+    async def test_evicted_duplicate_keeps_retained_copy(self, sample_message):
+        """Test evicting one copy of a message keeps it mapped while another is retained."""
+        conversation_manager = ConversationManager(max_context_messages=1)
+        thread = await conversation_manager.create_thread("test-topic", sample_message)
+        repeated = sample_message.copy(update={"id": uuid4()})
+        await conversation_manager.add_message_to_thread(repeated, thread.thread_id)
+        await conversation_manager.add_message_to_thread(repeated, thread.thread_id)
+        
+        assert conversation_manager.message_threads[repeated.id] == thread.thread_id
+        
+        await conversation_manager.add_message_to_thread(
+            sample_message.copy(update={"id": uuid4()}), thread.thread_id
+        )
+        assert conversation_manager.message_threads[repeated.id] == thread.thread_id
+        
+        await conversation_manager.add_message_to_thread(
+            sample_message.copy(update={"id": uuid4()}), thread.thread_id
+        )
+        assert repeated.id not in conversation_manager.message_threads
+    
+    async def test_archive_old_threads(self, conversation_manager, sample_message):
+        """Test only threads without recent activity are archived."""
+        old_message = sample_message.copy(update={"timestamp": datetime.utcnow() - timedelta(days=2)})
+        stale = await conversation_manager.create_thread("stale-topic", old_message)
+        await conversation_manager.add_message_to_thread(old_message, stale.thread_id)
+        revived = await conversation_manager.create_thread("revived-topic", old_message)
+        await conversation_manager.add_message_to_thread(old_message, revived.thread_id)
+        await conversation_manager.add_message_to_thread(sample_message, revived.thread_id)
+        
+        assert conversation_manager.archive_old_threads() == 1
+        assert not stale.is_active
+        assert revived.is_active
+    
+    async def test_activity_heap_is_bounded_by_threads(self, conversation_manager, sample_message):
+        """Test adding messages does not grow the archive queue."""
+        thread = await conversation_manager.create_thread("test-topic", sample_message)
+        for _ in range(20):
+            await conversation_manager.add_message_to_thread(
+                sample_message.copy(update={"id": uuid4(), "timestamp": datetime.utcnow()}),
+                thread.thread_id
+            )
+        
+        assert len(conversation_manager._activity_heap) <= 2
+        assert conversation_manager.archive_old_threads() == 0
+        assert thread.is_active
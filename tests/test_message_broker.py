@@ -0,0 +1,196 @@
+"""Tests for the message broker consumer handling."""
+
+import asyncio
+import time
+from collections import namedtuple
+
+import pytest
+
+from agentic_redpanda.core import message_broker
+from agentic_redpanda.schemas.message import AgentMessage, MessageType
+
+TopicPartition = namedtuple("TopicPartition", "topic partition")
+Record = namedtuple("Record", "key value")
+
+
+class FakeConsumer:
+    """Stand-in for KafkaConsumer that returns queued records on poll."""
+    
+    created = []
+    
+    def __init__(self, **config):
+        self.config = config
+        self.topics = []
+        self.pending = []
+        self.closed = False
+        FakeConsumer.created.append(self)
+    
+    def subscribe(self, topics):
+        self.topics = list(topics)
+    
+    def poll(self, timeout_ms=0, max_records=None):
+        time.sleep(0.001)
+        records = {}
+        while self.pending:
+            topic, value = self.pending.pop(0)
+            records.setdefault(TopicPartition(topic, 0), []).append(Record(b"other", value))
+        return records
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeFuture:
+    """Stand-in for a producer send future."""
+    
+    def add_callback(self, *args):
+        pass
+    
+    def add_errback(self, *args):
+        pass
+
+
+class FakeProducer:
+    """Stand-in for KafkaProducer that records sent values."""
+    
+    def __init__(self, **config):
+        self.config = config
+        self.sent = []
+    
+    def send(self, topic, value=None, key=None):
+        self.sent.append((topic, value))
+        return FakeFuture()
+    
+    def flush(self, timeout=None):
+        pass
+    
+    def close(self):
+        pass
+
+
+def encode(content, topic):
+    return AgentMessage(
+        sender_id="other",
+        sender_name="Other",
+        sender_role="peer",
+        message_type=MessageType.TEXT,
+        content=content,
+        topic=topic
+    ).to_json_bytes()
+
+
+@pytest.fixture
+async def broker(monkeypatch):
+    FakeConsumer.created = []
+    monkeypatch.setattr(message_broker, "KafkaConsumer", FakeConsumer)
+    monkeypatch.setattr(message_broker, "KafkaProducer", FakeProducer)
+    broker = message_broker.MessageBroker()
+    await broker.start()
+    yield broker
+    await broker.stop()
+
+
+class TestMessageBroker:
+    """Test cases for MessageBroker subscriptions."""
+    
+    async def test_agent_topics_share_one_consumer(self, broker):
+        """An agent's topics are multiplexed over a single consumer."""
+        received = []
+        batches = []
+        
+        async def handle_batch(messages):
+            batches.append([m.content for m in messages])
+        
+        await asyncio.gather(
+            broker.subscribe_to_topic("alpha", "agent-1", lambda m: received.append(m.content)),
+            broker.subscribe_to_topic_batch("beta", "agent-1", handle_batch, batch_size=5)
+        )
+        
+        assert len(FakeConsumer.created) == 1
+        consumer = FakeConsumer.created[0]
+        assert consumer.topics == ["alpha", "beta"]
+        assert consumer.config["group_id"] == "agent-agent-1"
+        
+        consumer.pending += [
+            ("alpha", encode("one", "alpha")),
+            ("beta", encode("two", "beta")),
+            ("beta", encode("three", "beta")),
+        ]
+        await asyncio.sleep(0.05)
+        
+        assert received == ["one"]
+        assert batches == [["two", "three"]]
+    
+    async def test_unsubscribe_closes_consumer_after_last_topic(self, broker):
+        """The shared consumer is resubscribed, then closed with its last topic."""
+        await broker.subscribe_to_topic("alpha", "agent-1", lambda m: None)
+        await broker.subscribe_to_topic("beta", "agent-1", lambda m: None)
+        consumer = FakeConsumer.created[0]
+        
+        await broker.unsubscribe_from_topic("alpha")
+        assert consumer.topics == ["beta"]
+        assert not consumer.closed
+        
+        await broker.unsubscribe_from_topic("beta")
+        assert consumer.closed
+        assert broker.consumers == {}
+    
+    async def test_publish_batch_encodes_repeated_message_once(self, broker, monkeypatch):
+        """A message queued several times in a batch is serialized once."""
+        message = AgentMessage.from_json_bytes(encode("fan out", "alpha"))
+        calls = []
+        original = AgentMessage.to_json_bytes
+        
+        def counting_to_json_bytes(self):
+            calls.append(self.id)
+            return original(self)
+        
+        monkeypatch.setattr(AgentMessage, "to_json_bytes", counting_to_json_bytes)
+        await broker.publish_batch([message, message, message])
+        
+        assert calls == [message.id]
+        assert [value for _, value in broker.producer.sent] == [original(message)] * 3
+    
+    async def test_async_handler_is_awaited_with_bounded_concurrency(self, broker):
+        """Coroutine handlers are awaited, at most max_concurrent_handlers at once."""
+        broker.max_concurrent_handlers = 2
+        running = 0
+        peak = 0
+        handled = []
+        
+        async def handle(message):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.005)
+            handled.append(message.content)
+            running -= 1
+        
+        await broker.subscribe_to_topic("alpha", "agent-1", handle)
+        FakeConsumer.created[0].pending += [("alpha", encode(str(i), "alpha")) for i in range(5)]
+        await asyncio.sleep(0.1)
+        
+        assert sorted(handled) == ["0", "1", "2", "3", "4"]
+        assert peak == 2
+    
+    async def test_drain_batches_flushes_on_stop_and_reports_errors(self):
+        """Queued messages are published in bounded batches before stopping."""
+        queue = asyncio.Queue()
+        for i in range(5):
+            queue.put_nowait(i)
+        queue.put_nowait(message_broker.STOP_DRAINING)
+        published = []
+        errors = []
+        
+        async def publish(batch):
+            published.append(batch)
+            if len(published) == 2:
+                raise ConnectionError("connection refused")
+        
+        async def on_error(error, batch):
+            errors.append((str(error), batch))
+        
+        await message_broker.drain_batches(queue, 2, 1.0, publish, on_error)
+        
+        assert published == [[0, 1], [2, 3], [4]]
+        assert errors == [("connection refused", [2, 3])]
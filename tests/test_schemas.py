@@ -54,6 +54,25 @@ class TestAgentMessage:
         assert restored_message.content == message.content
         assert restored_message.message_type == message.message_type
     
+    def test_message_json_bytes_roundtrip(self):
+        """Test serialization to and from JSON bytes."""
+        message = AgentMessage(
+            sender_id="test-agent",
+            sender_name="Test Agent",
+            sender_role="test",
+            message_type=MessageType.QUERY,
+            content="Hello, world!",
+            topic="test-topic",
+            correlation_id=uuid4(),
+            tags=["greeting"]
+        )
+        
+        data = message.to_json_bytes()
+        assert isinstance(data, bytes)
+        
+        restored_message = AgentMessage.from_json_bytes(data)
+        assert restored_message == message
+    
     def test_message_validation(self):
         """Test message validation."""
         # Test empty content validation